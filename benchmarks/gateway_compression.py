@@ -0,0 +1,96 @@
+"""
+Benchmark for gateway transport compression modes.
+
+Compresses a mix of gateway payloads the way Discord does for every mode (one flushed message per frame),
+then measures CPU time of inflating + JSON parsing with `krema.compression` inflaters.
+Reports CPU milliseconds per MB of JSON and wire size, so a mode can be chosen per deployment.
+`zstd-stream` is skipped when `zstandard` module is not installed.
+
+Usage:
+    python benchmarks/gateway_compression.py [--messages 5000] [--guilds 5] [--rounds 3]
+"""
+
+from argparse import ArgumentParser
+from json import dumps, loads
+from time import process_time
+from zlib import compressobj, Z_SYNC_FLUSH
+
+from krema.compression import get_inflater, zstandard
+
+# Reuse payload builders of the inflate benchmark.
+from gateway_inflate import message_payload, guild_payload
+
+
+def zlib_frames(messages: list) -> list:
+    stream = compressobj()
+    return [stream.compress(i) + stream.flush(Z_SYNC_FLUSH) for i in messages]
+
+
+def zstd_frames(messages: list) -> list:
+    stream = zstandard.ZstdCompressor().compressobj()
+    return [stream.compress(i) + stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) for i in messages]
+
+
+def plain_frames(messages: list) -> list:
+    # Uncompressed JSON is sent in text frames.
+    return [i.decode("utf-8") for i in messages]
+
+
+def run(compress, frames: list, rounds: int) -> float:
+    """Inflate and parse all frames `rounds` times with a fresh stream.
+
+    Returns:
+        float: Best CPU time of a round in seconds.
+    """
+
+    best = float("inf")
+
+    for _ in range(rounds):
+        inflater = get_inflater(compress)
+        started = process_time()
+
+        for frame in frames:
+            message = inflater.feed(frame)
+
+            if isinstance(message, bytes):
+                message = message.decode("utf-8")
+
+            loads(message)
+
+        best = min(best, process_time() - started)
+
+    return best
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=5000, help="Count of message payloads.")
+    parser.add_argument("--guilds", type=int, default=5, help="Count of guild payloads.")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds for each mode, best is reported.")
+    args = parser.parse_args()
+
+    payloads = [message_payload(i) for i in range(args.messages)] + \
+        [guild_payload(i) for i in range(args.guilds)]
+    messages = [dumps(i, separators=(",", ":")).encode() for i in payloads]
+    size = sum(len(i) for i in messages) / 1024 / 1024
+
+    modes = [("zlib-stream", zlib_frames), (None, plain_frames)]
+
+    if zstandard is not None:
+        modes.insert(1, ("zstd-stream", zstd_frames))
+    else:
+        print("zstandard is not installed, zstd-stream is skipped.")
+
+    print(f"JSON size: {size:.2f} MB in {len(messages)} payloads")
+    print(f"{'mode':<14}{'wire MB':>10}{'ratio':>8}{'CPU ms/MB':>12}")
+
+    for compress, build in modes:
+        frames = build(messages)
+        wire = sum(len(i) for i in frames) / 1024 / 1024
+        elapsed = run(compress, frames, args.rounds)
+
+        print(f"{str(compress):<14}{wire:>10.2f}{wire / size:>8.2f}{elapsed * 1000 / size:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
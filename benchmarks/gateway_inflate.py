@@ -0,0 +1,156 @@
+"""
+Benchmark for gateway zlib-stream inflating.
+
+Compares the previous inflate path (copy every frame into a new buffer, then decompress the buffer)
+with `krema.compression.ZlibStream` (decompress complete frames directly, reuse one buffer for split messages).
+Reports frames per second and peak bytes allocated per frame for small and large (GUILD_CREATE sized) payloads,
+for inflating alone and for inflating + JSON parsing.
+
+Usage:
+    python benchmarks/gateway_inflate.py [--frames 2000] [--guilds 10]
+"""
+
+from argparse import ArgumentParser
+from json import dumps, loads
+from time import perf_counter
+from zlib import compressobj, decompressobj, Z_SYNC_FLUSH
+import tracemalloc
+
+from krema.compression import ZlibStream
+
+
+def message_payload(index: int) -> dict:
+    return {
+        "t": "MESSAGE_CREATE",
+        "s": index,
+        "op": 0,
+        "d": {
+            "id": str(900000000000000000 + index),
+            "channel_id": "800000000000000000",
+            "guild_id": "700000000000000000",
+            "author": {"id": "600000000000000000", "username": "krema", "discriminator": "0001", "avatar": None},
+            "content": "hello world " * 8,
+            "timestamp": "2021-08-20T12:00:00.000000+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0
+        }
+    }
+
+
+def guild_payload(index: int, members: int = 20000) -> dict:
+    return {
+        "t": "GUILD_CREATE",
+        "s": index,
+        "op": 0,
+        "d": {
+            "id": str(700000000000000000 + index),
+            "name": "guild",
+            "roles": [{"id": str(500000000000000000 + i), "name": f"role {i}", "permissions": "0"} for i in range(100)],
+            "channels": [{"id": str(400000000000000000 + i), "type": 0, "name": f"channel-{i}"} for i in range(300)],
+            "members": [{
+                "user": {"id": str(300000000000000000 + i), "username": f"user{i}", "discriminator": "0001", "avatar": None},
+                "roles": [],
+                "joined_at": "2021-08-20T12:00:00.000000+00:00",
+                "deaf": False,
+                "mute": False
+            } for i in range(members)]
+        }
+    }
+
+
+def compress_frames(payloads: list) -> list:
+    """Compress payloads like Discord does, one sync-flushed message per payload."""
+
+    stream = compressobj()
+    return [stream.compress(dumps(i, separators=(",", ":")).encode()) + stream.flush(Z_SYNC_FLUSH) for i in payloads]
+
+
+def legacy_path(parse: bool):
+    """Previous gateway path, returns a function that handles one frame."""
+
+    state = {"zlib": decompressobj(), "buffer": bytearray()}
+
+    def handle(data: bytes):
+        state["buffer"].extend(data)
+        message = state["zlib"].decompress(state["buffer"])
+        state["buffer"] = bytearray()
+
+        if parse:
+            loads(message.decode("utf-8"))
+
+    return handle
+
+
+def stream_path(parse: bool):
+    """Current gateway path, returns a function that handles one frame."""
+
+    inflater = ZlibStream()
+
+    def handle(data: bytes):
+        message = inflater.feed(data)
+
+        if parse:
+            loads(message.decode("utf-8"))
+
+    return handle
+
+
+def measure(path, frames: list, parse: bool) -> tuple:
+    """Run frames through a fresh path twice, once for speed and once for allocations.
+
+    Returns:
+        tuple: Frames per second and average peak of bytes allocated while handling a frame.
+    """
+
+    handle = path(parse)
+    started = perf_counter()
+
+    for frame in frames:
+        handle(frame)
+
+    elapsed = perf_counter() - started
+
+    handle = path(parse)
+    allocated = 0
+    tracemalloc.start()
+
+    for frame in frames:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        handle(frame)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+
+    tracemalloc.stop()
+
+    return len(frames) / elapsed, allocated / len(frames)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=2000, help="Count of small frames.")
+    parser.add_argument("--guilds", type=int, default=10, help="Count of large frames.")
+    args = parser.parse_args()
+
+    cases = (
+        ("message_create", compress_frames([message_payload(i) for i in range(args.frames)])),
+        ("guild_create", compress_frames([guild_payload(i) for i in range(args.guilds)]))
+    )
+
+    print(f"{'payload':<16}{'step':<16}{'path':<10}{'frames/s':>12}{'bytes/frame':>16}")
+
+    for name, frames in cases:
+        for step, parse in (("inflate", False), ("inflate+parse", True)):
+            for label, path in (("legacy", legacy_path), ("stream", stream_path)):
+                rate, allocated = measure(path, frames, parse)
+                print(f"{name:<16}{step:<16}{label:<10}{rate:>12.0f}{allocated:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""
+Cache backends part of the krema.
+"""
+
+import io
+import pickle
+import sqlite3
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Union
+from weakref import WeakSet
+
+from .models.user import User
+
+
+# Types that never have a persistent ID, skipped before the checks of `_Pickler.persistent_id`.
+_PLAIN_TYPES: frozenset = frozenset((str, int, float, bool, type(None), list, dict, tuple))
+
+
+class CacheBackend:
+    """Base class for cache backends.
+
+    A backend gives the stores of the client a mapping for every namespace ("guilds", "channels", "messages",
+    "members:<guild ID>"). Mappings keep the insert order like `OrderedDict`, the stores use it for eviction.
+
+    Args:
+        client (Client): Krema client, set by the client with `bind` (default is None).
+
+    Attributes:
+        client (Client): Krema client.
+    """
+
+    def __init__(self, client=None) -> None:
+        self.client = client
+
+    def bind(self, client):
+        """Bind the backend to a client, called when the client is created.
+
+        Args:
+            client (Client): Krema client.
+        """
+
+        self.client = client
+
+    def namespace(self, name: str) -> Any:
+        """Get the mapping of a namespace, same mapping is returned for same name.
+
+        Args:
+            name (str): Namespace name.
+
+        Returns:
+            Any: Mapping with `OrderedDict` methods.
+        """
+
+        raise NotImplementedError
+
+    def drop(self, name: str):
+        """Remove a namespace with all of its values.
+
+        Args:
+            name (str): Namespace name.
+        """
+
+        pass
+
+    def close(self):
+        """Close the backend connection."""
+
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """Default backend, objects are kept in the Python heap as they are.
+
+    Examples:
+        >>> krema.Client(cache_backend=krema.backends.MemoryBackend())
+    """
+
+    def namespace(self, name: str) -> OrderedDict:
+        return OrderedDict()
+
+
+class _Pickler(pickle.Pickler):
+    """Pickler that doesn't copy the client, users and backend mappings into the values."""
+
+    def __init__(self, file, backend: CacheBackend) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.backend = backend
+
+        # Same tuple for a user, so pickle memo writes a user once for all references.
+        self._users: dict = {}
+
+    def persistent_id(self, obj: Any) -> Any:
+        # Called for every pickled object, most of them are plain values.
+        if type(obj) in _PLAIN_TYPES:
+            return None
+        elif obj is self.backend.client:
+            return ("client", )
+        elif isinstance(obj, User):
+            pid = self._users.get(obj.id)
+
+            if pid is None:
+                pid = self._users[obj.id] = ("user", {key: value for key, value in obj.__dict__.items()
+                                                      if key not in ("client", "_snapshots")})
+
+            return pid
+        elif isinstance(obj, BackendMapping):
+            return ("namespace", obj.name)
+        elif isinstance(obj, WeakSet):
+            return ("weakset", )
+
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickler that gives back the client, interned users and backend mappings."""
+
+    def __init__(self, file, backend: CacheBackend) -> None:
+        super().__init__(file)
+        self.backend = backend
+
+    def persistent_load(self, pid: tuple) -> Any:
+        kind = pid[0]
+        client = self.backend.client
+
+        if kind == "client":
+            return client
+        elif kind == "user":
+            user = client.users.get(pid[1]["id"])
+
+            if user is None:
+                user = User.__new__(User)
+                user.__dict__.update(pid[1])
+                user.client = client
+                user = client.users.add(user)
+
+            return user
+        elif kind == "namespace":
+            return self.backend.namespace(pid[1])
+        elif kind == "weakset":
+            return WeakSet()
+
+        raise pickle.UnpicklingError(f"Unknown persistent ID: {kind}")
+
+
+def dump(backend: CacheBackend, obj: Any, file):
+    """Pickle a cached object for a backend into a file.
+
+    The client is not pickled, users are pickled by value and interned again when loaded.
+
+    Args:
+        backend (CacheBackend): Backend that has the client.
+        obj (Any): Object to pickle.
+        file (Any): Binary file object.
+    """
+
+    _Pickler(file, backend).dump(obj)
+
+
+def load(backend: CacheBackend, file) -> Any:
+    """Load an object pickled with `dump` from a file.
+
+    Args:
+        backend (CacheBackend): Backend that has the client.
+        file (Any): Binary file object, a `mmap.mmap` works without copying the data.
+
+    Returns:
+        Any: Loaded object.
+    """
+
+    return _Unpickler(file, backend).load()
+
+
+def dumps(backend: CacheBackend, obj: Any) -> bytes:
+    """Pickle a cached object for a backend, same as `dump` but returns the data.
+
+    Args:
+        backend (CacheBackend): Backend that has the client.
+        obj (Any): Object to pickle.
+
+    Returns:
+        bytes: Pickled object.
+    """
+
+    file = io.BytesIO()
+    dump(backend, obj, file)
+
+    return file.getvalue()
+
+
+def loads(backend: CacheBackend, data: bytes) -> Any:
+    """Load an object pickled with `dumps`.
+
+    Args:
+        backend (CacheBackend): Backend that has the client.
+        data (bytes): Pickled object.
+
+    Returns:
+        Any: Loaded object.
+    """
+
+    return load(backend, io.BytesIO(data))
+
+
+class BackendMapping:
+    """Mapping of a namespace in a backend that keeps the values outside of the Python heap.
+
+    Only the keys are kept in memory, in insert order, so length, membership and eviction don't use the backend.
+    Values are pickled when set and loaded when read, so every read gives a new copy of the object.
+
+    Args:
+        backend (CacheBackend): Backend of the mapping.
+        name (str): Namespace name.
+
+    Attributes:
+        backend (CacheBackend): Backend of the mapping.
+        name (str): Namespace name.
+    """
+
+    def __init__(self, backend: CacheBackend, name: str) -> None:
+        self.backend: CacheBackend = backend
+        self.name: str = name
+
+        self._keys: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._keys
+
+    def __getitem__(self, key: Any) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+
+        return loads(self.backend, self._load(key))
+
+    def __setitem__(self, key: Any, value: Any):
+        self._dump(key, dumps(self.backend, value))
+        self._keys[key] = None
+
+    def __delitem__(self, key: Any):
+        del self._keys[key]
+        self._remove(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self._keys else default
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        if key not in self._keys:
+            return default
+
+        value = self[key]
+        del self[key]
+
+        return value
+
+    def keys(self):
+        return self._keys.keys()
+
+    def values(self) -> list:
+        return [value for _, value in self.items()]
+
+    def items(self) -> list:
+        return [(key, self[key]) for key in tuple(self._keys)]
+
+    def update(self, values: dict):
+        for key, value in values.items():
+            self[key] = value
+
+    def move_to_end(self, key: Any, last: bool = True):
+        self._keys.move_to_end(key, last)
+
+    def popitem(self, last: bool = True) -> tuple:
+        key = next(reversed(self._keys)) if last else next(iter(self._keys))
+        return key, self.pop(key)
+
+    def clear(self):
+        self._keys.clear()
+        self._clear()
+
+    def _load(self, key: Any) -> bytes:
+        raise NotImplementedError
+
+    def _dump(self, key: Any, data: bytes):
+        raise NotImplementedError
+
+    def _remove(self, key: Any):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+class _SQLiteMapping(BackendMapping):
+    def _load(self, key: Any) -> bytes:
+        return self.backend.connection.execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ?", (self.name, key)).fetchone()[0]
+
+    def _dump(self, key: Any, data: bytes):
+        self.backend.connection.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value) VALUES (?, ?, ?)", (self.name, key, data))
+
+    def _remove(self, key: Any):
+        self.backend.connection.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (self.name, key))
+
+    def _clear(self):
+        self.backend.connection.execute("DELETE FROM cache WHERE namespace = ?", (self.name, ))
+
+    def update(self, values: dict):
+        rows = [(self.name, key, dumps(self.backend, value)) for key, value in values.items()]
+        connection = self.backend.connection
+
+        # Connection is in autocommit mode, one transaction for all rows instead of one for every row.
+        connection.execute("BEGIN")
+
+        try:
+            connection.executemany("INSERT OR REPLACE INTO cache (namespace, key, value) VALUES (?, ?, ?)", rows)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+        for key in values:
+            self._keys[key] = None
+
+    def items(self) -> list:
+        # One query for the namespace instead of one for every key.
+        rows = dict(self.backend.connection.execute(
+            "SELECT key, value FROM cache WHERE namespace = ?", (self.name, )))
+
+        return [(key, loads(self.backend, rows[key])) for key in self._keys]
+
+
+class SQLiteBackend(CacheBackend):
+    """Backend that keeps the cached objects in a SQLite database, for member and message sets that don't fit in memory.
+
+    Database uses WAL journal, so writes don't wait for a full sync. Old rows are removed when the client is bound,
+    the cache is always filled again from the gateway. Queries block the event loop, they are small and indexed by the primary key.
+
+    Args:
+        path (str): Database file path, ":memory:" for a temporary database (default is "krema-cache.db").
+
+    Attributes:
+        path (str): Database file path.
+        connection (sqlite3.Connection): Database connection.
+
+    Examples:
+        >>> krema.Client(cache_backend=krema.backends.SQLiteBackend("cache.db"))
+    """
+
+    def __init__(self, path: str = "krema-cache.db") -> None:
+        super().__init__()
+
+        self.path: str = path
+        self.connection: sqlite3.Connection = sqlite3.connect(path, isolation_level=None)
+        self._namespaces: dict = {}
+
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache (namespace TEXT, key INTEGER, value BLOB, PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+
+    def bind(self, client):
+        super().bind(client)
+        self.connection.execute("DELETE FROM cache")
+
+    def namespace(self, name: str) -> BackendMapping:
+        mapping = self._namespaces.get(name)
+
+        if mapping is None:
+            mapping = self._namespaces[name] = _SQLiteMapping(self, name)
+
+        return mapping
+
+    def drop(self, name: str):
+        mapping = self._namespaces.pop(name, None)
+
+        if mapping is not None:
+            mapping.clear()
+
+    def close(self):
+        self.connection.close()
+
+
+class _KeyValueMapping(BackendMapping):
+    def _key(self, key: Any) -> str:
+        return f"{self.backend.prefix}{self.name}:{key}"
+
+    def _load(self, key: Any) -> bytes:
+        return self.backend.store.get(self._key(key))
+
+    def _dump(self, key: Any, data: bytes):
+        self.backend.store.set(self._key(key), data)
+
+    def _remove(self, key: Any):
+        self.backend.store.delete(self._key(key))
+
+    def _clear(self):
+        for key in list(self.backend.store.scan_iter(f"{self.backend.prefix}{self.name}:*")):
+            self.backend.store.delete(key)
+
+
+class KeyValueBackend(CacheBackend):
+    """Backend for external key-value stores like Redis.
+
+    The store needs `get(key)`, `set(key, value)`, `delete(key)` and `scan_iter(pattern)` methods with glob-style patterns,
+    a synchronous `redis.Redis` client works as is. Keys are `<prefix><namespace>:<key>`, old keys with the prefix are removed when the client is bound.
+
+    Args:
+        store (Any): Key-value store.
+        prefix (str): Prefix for all keys, use a different prefix for every client sharing a store (default is "krema:").
+
+    Attributes:
+        store (Any): Key-value store.
+        prefix (str): Prefix for all keys.
+
+    Examples:
+        >>> krema.Client(cache_backend=krema.backends.KeyValueBackend(redis.Redis(), prefix="bot:0:"))
+        >>> krema.Client(cache_backend=krema.backends.KeyValueBackend(krema.backends.LocalKeyValueStore()))
+    """
+
+    def __init__(self, store: Any, prefix: str = "krema:") -> None:
+        super().__init__()
+
+        self.store: Any = store
+        self.prefix: str = prefix
+        self._namespaces: dict = {}
+
+    def bind(self, client):
+        super().bind(client)
+
+        for key in list(self.store.scan_iter(f"{self.prefix}*")):
+            self.store.delete(key)
+
+    def namespace(self, name: str) -> BackendMapping:
+        mapping = self._namespaces.get(name)
+
+        if mapping is None:
+            mapping = self._namespaces[name] = _KeyValueMapping(self, name)
+
+        return mapping
+
+    def drop(self, name: str):
+        mapping = self._namespaces.pop(name, None)
+
+        if mapping is not None:
+            mapping.clear()
+
+
+class LocalKeyValueStore:
+    """In-process key-value store with the methods that `KeyValueBackend` needs, for tests and single process bots.
+
+    Values are still pickled, so it shows the behavior of an external store without running one.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict = {}
+
+    def get(self, key: str) -> Union[bytes, None]:
+        return self._values.get(key)
+
+    def set(self, key: str, value: bytes):
+        self._values[key] = value
+
+    def delete(self, key: str):
+        self._values.pop(key, None)
+
+    def scan_iter(self, match: str = "*"):
+        return (key for key in tuple(self._values) if fnmatchcase(key, match))
@@ -0,0 +1,1115 @@
+"""
+Cache part of the krema.
+"""
+
+from collections import OrderedDict
+from sys import getsizeof
+from time import monotonic
+from typing import Any, Callable, Union
+from weakref import WeakValueDictionary
+
+from .backends import CacheBackend, MemoryBackend
+
+from unikorn.kollektor import Nothing
+
+
+class CachePolicy:
+    """Cache settings for a model type.
+
+    Args:
+        max_entries (int): Maximum count of objects, None for no limit (default is None).
+        ttl (float): Seconds an object is kept after it is added or updated, None for no expiry (default is None).
+        max_memory (int): Memory budget in bytes, estimated from the shallow size of the objects. None for no budget (default is None).
+        predicate (Callable): Function that gets an object and returns True if it should be cached (default is None).
+        strategy (str): Eviction strategy when a limit is reached, "lru" (least recently used), "lfu" (least frequently used) or "fifo" (oldest added) (default is "lru").
+        enabled (bool): Cache this type, a disabled type doesn't register its cache handlers (default is True).
+
+    Attributes are same with the arguments. Members, users and presences are kept as long as their guild (or a reference to the user),
+    so their policies only support `enabled` and `predicate`.
+
+    Examples:
+        >>> krema.Client(cache_policies={
+        ...     "guilds": krema.cache.CachePolicy(predicate=lambda g: g.id in SERVED_GUILDS),
+        ...     "messages": krema.cache.CachePolicy(max_entries=5000, ttl=3600, strategy="lfu"),
+        ...     "presences": krema.cache.CachePolicy(enabled=True)
+        ... })
+    """
+
+    STRATEGIES: tuple = ("lru", "lfu", "fifo")
+
+    def __init__(self, max_entries: int = None, ttl: float = None, max_memory: int = None,
+                 predicate: Callable = None, strategy: str = "lru", enabled: bool = True) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unsupported cache strategy: {strategy}")
+
+        self.max_entries: Union[int, None] = max_entries
+        self.ttl: Union[float, None] = ttl
+        self.max_memory: Union[int, None] = max_memory
+        self.predicate: Union[Callable, None] = predicate
+        self.strategy: str = strategy
+        self.enabled: bool = enabled
+
+    def accepts(self, obj: Any) -> bool:
+        """Whether an object should be cached.
+
+        Args:
+            obj (Any): Object to check.
+
+        Returns:
+            bool: True if the type is enabled and the predicate accepts the object.
+        """
+
+        return self.enabled and (self.predicate is None or self.predicate(obj))
+
+    @property
+    def limited(self) -> bool:
+        """Whether the policy has a limit or a strategy other than the default."""
+
+        return self.max_entries is not None or self.ttl is not None or self.max_memory is not None or self.strategy != "lru"
+
+
+# Cache types whose policies only filter the cached objects, limits are not supported.
+FILTERED_CACHE_TYPES: tuple = ("members", "users", "presences")
+
+
+# Event name prefixes mapped to the cache type that their handlers update, the first match is used.
+EVENT_CACHE_TYPES: tuple = (
+    ("guild_member_", "members"),
+    ("presence_", "presences"),
+    ("message_", "messages"),
+    ("channel_", "channels"),
+    ("thread_", "channels"),
+    ("guild_", "guilds")
+)
+
+
+def event_cache_type(event_name: str) -> Union[str, None]:
+    """Get the cache type that is updated by an event.
+
+    Args:
+        event_name (str): Event name in lowercase.
+
+    Returns:
+        str: Key of `Client.cache_policies`.
+        None: Event updates more than one type (GUILD_CREATE and GUILD_DELETE also update channels) or no type.
+    """
+
+    if event_name in ("guild_create", "guild_delete"):
+        return None
+
+    return next((value for key, value in EVENT_CACHE_TYPES if event_name.startswith(key)), None)
+
+
+def sizeof(obj: Any) -> int:
+    """Estimate the memory of an object with its attributes, nested objects are not followed.
+
+    Args:
+        obj (Any): Object to measure.
+
+    Returns:
+        int: Size in bytes.
+    """
+
+    size = getsizeof(obj)
+    attributes = getattr(obj, "__dict__", None)
+
+    if attributes is not None:
+        size += getsizeof(attributes) + sum(getsizeof(i) for i in attributes.values())
+
+    return size
+
+
+class _Frequencies:
+    """Access counts for LFU eviction, every operation is O(1)."""
+
+    def __init__(self) -> None:
+        self._counts: dict = {}
+        self._buckets: dict = {}
+        self._min: int = 0
+
+    def add(self, key: Any):
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min = 1
+
+    def touch(self, key: Any):
+        count = self._counts[key]
+        self.__unlink(key, count)
+
+        if self._min == count and count not in self._buckets:
+            self._min = count + 1
+
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def remove(self, key: Any):
+        self.__unlink(key, self._counts.pop(key))
+
+    def least(self) -> Any:
+        if self._min not in self._buckets:
+            self._min = min(self._buckets)
+
+        return next(iter(self._buckets[self._min]))
+
+    def clear(self):
+        self._counts.clear()
+        self._buckets.clear()
+
+    def __unlink(self, key: Any, count: int):
+        bucket = self._buckets[count]
+        del bucket[key]
+
+        if len(bucket) == 0:
+            del self._buckets[count]
+
+
+class Store:
+    """Cache store indexed by ID.
+
+    Get, upsert and delete are O(1). Objects are removed by the cache policy: when `max_entries` or `max_memory` is reached
+    the strategy chooses the object to remove, and objects older than `ttl` are removed when the store is used.
+    Also has the read methods of `kollektor.Kollektor` (`items`, `length`, `find`, `filter`, `first`, `last`)
+    and `append`, so the code written for the previous caches still works.
+
+    Objects are kept in a namespace of the cache backend. Backends other than `MemoryBackend` keep copies,
+    so an object that is changed in place must be written back with `save`.
+
+    Args:
+        limit (int): Maximum count of objects, None for no limit (default is None).
+        policy (CachePolicy): Cache policy, overrides `limit` (default is None).
+        backend (CacheBackend): Cache backend (default is a new `MemoryBackend`).
+
+    Attributes:
+        policy (CachePolicy): Cache policy.
+        backend (CacheBackend): Cache backend.
+        memory (int): Estimated memory of the objects in bytes, only calculated when the policy has `max_memory`.
+
+    Examples:
+        >>> store = krema.cache.Store(limit=2)
+        >>> store.upsert(guild)
+        >>> store.get(guild.id)
+        Guild()
+    """
+
+    NAMESPACE: str = "items"
+
+    def __init__(self, limit: int = None, policy: CachePolicy = None, backend: CacheBackend = None) -> None:
+        self.policy: CachePolicy = policy or CachePolicy(max_entries=limit, strategy="fifo")
+        self.backend: CacheBackend = backend or MemoryBackend()
+        self.memory: int = 0
+
+        self._items: Any = self.backend.namespace(self.NAMESPACE)
+        self._expires: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._frequencies: _Frequencies = _Frequencies()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(tuple(self._items.values()))
+
+    def __contains__(self, object_id: int) -> bool:
+        self._expire()
+        return object_id in self._items
+
+    @property
+    def limit(self) -> Union[int, None]:
+        """Maximum count of objects, same as `policy.max_entries`.
+
+        Returns:
+            int: Limit, None for no limit.
+        """
+
+        return self.policy.max_entries
+
+    @limit.setter
+    def limit(self, limit: Union[int, None]):
+        self.policy.max_entries = limit
+
+    @property
+    def items(self) -> tuple:
+        """All objects, in eviction order (next one to remove first, except for LFU).
+
+        Returns:
+            tuple: Cached objects.
+        """
+
+        self._expire()
+        return tuple(self._items.values())
+
+    @property
+    def length(self) -> int:
+        """Count of objects.
+
+        Returns:
+            int: Object count.
+        """
+
+        return len(self._items)
+
+    def get(self, object_id: int) -> Any:
+        """Get an object by ID.
+
+        Args:
+            object_id (int): Object ID.
+
+        Returns:
+            Any: Found object.
+            None: Object is not cached.
+        """
+
+        self._expire()
+        obj = self._items.get(object_id)
+
+        if obj is not None:
+            self._touch(object_id)
+
+        return obj
+
+    def upsert(self, obj: Any) -> Any:
+        """Add an object or replace the cached one with same ID.
+
+        Objects that the policy doesn't accept are not added, and the cached one with same ID is removed.
+
+        Args:
+            obj (Any): Object with `id` attribute.
+
+        Returns:
+            Any: Replaced object, None if the object is new or not accepted.
+        """
+
+        policy = self.policy
+
+        if not policy.accepts(obj):
+            self.delete(obj.id)
+            return None
+
+        self._expire()
+        old = self._items.get(obj.id)
+
+        if old is None:
+            if policy.max_entries is not None:
+                if policy.max_entries <= 0:
+                    return None
+
+                while len(self._items) >= policy.max_entries:
+                    self._evict()
+
+            self._items[obj.id] = obj
+
+            if policy.strategy == "lfu":
+                self._frequencies.add(obj.id)
+
+            self._add_index(obj)
+
+            # Indexes can remove the object again, like the channel limit of messages.
+            if obj.id not in self._items:
+                return None
+        else:
+            self._items[obj.id] = obj
+            self._touch(obj.id)
+            self._replace_index(old, obj)
+
+        if policy.ttl is not None:
+            self._expires[obj.id] = monotonic() + policy.ttl
+            self._expires.move_to_end(obj.id)
+
+        if policy.max_memory is not None:
+            size = sizeof(obj)
+            self.memory += size - self._sizes.get(obj.id, 0)
+            self._sizes[obj.id] = size
+
+            while self.memory > policy.max_memory and len(self._items) > 1:
+                self._evict()
+
+        return old
+
+    def save(self, obj: Any):
+        """Write an object that is changed in place back to the backend, does nothing if it is not cached.
+
+        Args:
+            obj (Any): Cached object.
+        """
+
+        if obj.id in self._items:
+            self._items[obj.id] = obj
+
+    def delete(self, object_id: int) -> Any:
+        """Remove an object by ID.
+
+        Args:
+            object_id (int): Object ID.
+
+        Returns:
+            Any: Removed object, None if it is not cached.
+        """
+
+        obj = self._items.pop(object_id, None)
+        self._expires.pop(object_id, None)
+
+        if obj is None:
+            return None
+
+        self.memory -= self._sizes.pop(object_id, 0)
+
+        if self.policy.strategy == "lfu":
+            self._frequencies.remove(object_id)
+
+        self._remove_index(obj)
+
+        return obj
+
+    def clear(self):
+        """Remove all objects."""
+
+        for obj in self._items.values():
+            self._remove_index(obj)
+
+        self._items.clear()
+        self._expires.clear()
+        self._sizes.clear()
+        self._frequencies.clear()
+        self.memory = 0
+
+    def append(self, *args: Any) -> tuple:
+        """Add one or more objects, same as `upsert` for each object.
+
+        Args:
+            *args: The object(s) will be added.
+
+        Returns:
+            tuple: Added objects.
+        """
+
+        for obj in args:
+            self.upsert(obj)
+
+        return args
+
+    def find(self, fn: Callable) -> Union[Any, Nothing]:
+        """Find an object with a function, scans the store. Use `get` for IDs.
+
+        Args:
+            fn (Callable): The function must return bool.
+
+        Returns:
+            Any: Found object.
+            kollektor.Nothing
+        """
+
+        for value in self._items.values():
+            if fn(value):
+                return value
+
+        return Nothing
+
+    def filter(self, fn: Callable) -> tuple:
+        """Filter objects with a function, scans the store.
+
+        Returns:
+            tuple: Filtered object(s).
+        """
+
+        return tuple(value for value in self._items.values() if fn(value))
+
+    def first(self) -> Union[Any, Nothing]:
+        """Get the oldest object.
+
+        Returns:
+            Any: object.
+            kollektor.Nothing
+        """
+
+        return next(iter(self._items.values()), Nothing)
+
+    def last(self) -> Union[Any, Nothing]:
+        """Get the newest object.
+
+        Returns:
+            Any: object.
+            kollektor.Nothing
+        """
+
+        return next(reversed(self._items.values()), Nothing)
+
+    def _add_index(self, obj: Any):
+        """Add an object to the secondary indexes, called after it is stored."""
+
+        pass
+
+    def _remove_index(self, obj: Any):
+        """Remove an object from the secondary indexes, called after it is removed."""
+
+        pass
+
+    def _replace_index(self, old: Any, obj: Any):
+        """Replace an object in the secondary indexes, called after it is replaced."""
+
+        self._remove_index(old)
+        self._add_index(obj)
+
+    def _touch(self, object_id: int):
+        """Record an access for the eviction strategy."""
+
+        strategy = self.policy.strategy
+
+        if strategy == "lru":
+            self._items.move_to_end(object_id)
+        elif strategy == "lfu":
+            self._frequencies.touch(object_id)
+
+    def _evict(self):
+        """Remove the object chosen by the eviction strategy."""
+
+        if self.policy.strategy == "lfu":
+            self.delete(self._frequencies.least())
+        else:
+            self.delete(next(iter(self._items)))
+
+    def _expire(self):
+        """Remove the objects older than `ttl`, they are ordered by their expiry time."""
+
+        if len(self._expires) == 0:
+            return
+
+        now = monotonic()
+
+        while self._expires:
+            object_id, expires = next(iter(self._expires.items()))
+
+            if expires > now:
+                break
+
+            self.delete(object_id)
+
+
+def _index_add(index: dict, key: Any, obj: Any):
+    if key is not None:
+        index.setdefault(key, {})[obj.id] = obj
+
+
+def _index_remove(index: dict, key: Any, obj: Any):
+    bucket = index.get(key)
+
+    if bucket is not None and bucket.pop(obj.id, None) is not None and len(bucket) == 0:
+        del index[key]
+
+
+class GuildStore(Store):
+    """Guild cache with roles, emojis, members and presences indexed by guild.
+
+    Changes from gateway events are applied to the cached Guild objects in place.
+    Members of every guild are kept in their own backend namespace, so they can be moved out of memory with the guilds.
+    Only `enabled` and `predicate` of `member_policy` and `presence_policy` are used.
+
+    Args:
+        limit (int): Maximum count of guilds, None for no limit (default is None).
+        policy (CachePolicy): Cache policy of guilds, overrides `limit` (default is None).
+        member_policy (CachePolicy): Cache policy of members, the predicate gets Member objects (default is None).
+        presence_policy (CachePolicy): Cache policy of presences, the predicate gets presence payloads. Disabled by default,
+            the presences of GUILD_CREATE are still kept in `Guild.presences` but they are not indexed or updated (default is None).
+        backend (CacheBackend): Cache backend (default is a new `MemoryBackend`).
+    """
+
+    NAMESPACE: str = "guilds"
+
+    def __init__(self, limit: int = None, policy: CachePolicy = None, member_policy: CachePolicy = None,
+                 presence_policy: CachePolicy = None, backend: CacheBackend = None) -> None:
+        super().__init__(limit, policy, backend)
+
+        self.member_policy: CachePolicy = member_policy or CachePolicy()
+        self.presence_policy: CachePolicy = presence_policy or CachePolicy(enabled=False)
+
+        # Guild ID -> role / emoji / user ID -> object.
+        self._roles: dict = {}
+        self._emojis: dict = {}
+        self._members: dict = {}
+        self._presences: dict = {}
+
+    def upsert(self, obj: Any) -> Any:
+        """Add a guild or replace the cached one with same ID.
+
+        Members and presences of the guild are indexed first, a guild without them (GUILD_UPDATE) keeps the cached ones.
+
+        Args:
+            obj (Guild): Guild object.
+
+        Returns:
+            Guild: Replaced guild, None if the guild is new or not accepted.
+        """
+
+        if self.policy.accepts(obj):
+            self.__index_members(obj)
+            self.__index_presences(obj)
+
+        return super().upsert(obj)
+
+    def roles(self, guild_id: int) -> tuple:
+        """Get the roles of a guild.
+
+        Args:
+            guild_id (int): Guild ID.
+
+        Returns:
+            tuple: Role objects.
+        """
+
+        return tuple(self._roles.get(guild_id, {}).values())
+
+    def get_role(self, guild_id: int, role_id: int) -> Any:
+        """Get a role of a guild by ID.
+
+        Args:
+            guild_id (int): Guild ID.
+            role_id (int): Role ID.
+
+        Returns:
+            Role: Found role.
+            None: Role is not cached.
+        """
+
+        return self._roles.get(guild_id, {}).get(role_id)
+
+    def emojis(self, guild_id: int) -> tuple:
+        """Get the emojis of a guild.
+
+        Args:
+            guild_id (int): Guild ID.
+
+        Returns:
+            tuple: Emoji objects.
+        """
+
+        return tuple(self._emojis.get(guild_id, {}).values())
+
+    def presences(self, guild_id: int) -> tuple:
+        """Get the current presences of a guild, `Guild.presences` only has the ones from GUILD_CREATE.
+
+        Presences are only indexed when `presence_policy` is enabled.
+
+        Args:
+            guild_id (int): Guild ID.
+
+        Returns:
+            tuple: Presence payloads.
+        """
+
+        return tuple(self._presences.get(guild_id, {}).values())
+
+    def get_presence(self, guild_id: int, user_id: int) -> Union[dict, None]:
+        """Get the presence of a member.
+
+        Args:
+            guild_id (int): Guild ID.
+            user_id (int): User ID of the member.
+
+        Returns:
+            dict: Presence payload.
+            None: Presence is not cached.
+        """
+
+        return self._presences.get(guild_id, {}).get(user_id)
+
+    def update_presence(self, guild_id: int, presence: dict):
+        """Add or replace a presence of a cached guild, offline presences are removed.
+
+        Args:
+            guild_id (int): Guild ID.
+            presence (dict): Presence payload.
+        """
+
+        presences = self._presences.get(guild_id)
+
+        if presences is None:
+            return
+
+        user_id = int(presence["user"]["id"])
+
+        if presence.get("status") == "offline" or not self.presence_policy.accepts(presence):
+            presences.pop(user_id, None)
+        else:
+            presences[user_id] = presence
+
+    def upsert_role(self, guild_id: int, role: Any):
+        """Add or replace a role of a cached guild.
+
+        Args:
+            guild_id (int): Guild ID.
+            role (Role): Role object.
+        """
+
+        guild = self._items.get(guild_id)
+
+        if guild is not None:
+            _index_add(self._roles, guild_id, role)
+            guild.roles = list(self._roles[guild_id].values())
+            self.save(guild)
+
+    def delete_role(self, guild_id: int, role_id: int) -> Any:
+        """Remove a role of a guild.
+
+        Args:
+            guild_id (int): Guild ID.
+            role_id (int): Role ID.
+
+        Returns:
+            Role: Removed role, None if it is not cached.
+        """
+
+        role = self._roles.get(guild_id, {}).pop(role_id, None)
+
+        if role is not None:
+            guild = self._items[guild_id]
+            guild.roles = list(self._roles[guild_id].values())
+            self.save(guild)
+
+        return role
+
+    def set_emojis(self, guild_id: int, emojis: list):
+        """Replace the emojis of a cached guild, Discord always sends the full list.
+
+        Args:
+            guild_id (int): Guild ID.
+            emojis (list): Emoji objects.
+        """
+
+        guild = self._items.get(guild_id)
+
+        if guild is not None:
+            self._emojis[guild_id] = {i.id: i for i in emojis}
+            guild.emojis = list(emojis)
+            self.save(guild)
+
+    def set_stickers(self, guild_id: int, stickers: list):
+        """Replace the stickers of a cached guild, Discord always sends the full list.
+
+        Args:
+            guild_id (int): Guild ID.
+            stickers (list): Sticker objects.
+        """
+
+        guild = self._items.get(guild_id)
+
+        if guild is not None:
+            guild.stickers = list(stickers)
+            self.save(guild)
+
+    def upsert_member(self, guild_id: int, member: Any, joined: bool = False):
+        """Add or replace a member of a cached guild.
+
+        Args:
+            guild_id (int): Guild ID.
+            member (Member): Member object.
+            joined (bool, optional): Member is new in the guild, increases `member_count` (default is False).
+        """
+
+        if guild_id not in self._items or member.user is None or not self.member_policy.accepts(member):
+            return
+
+        members = self._members.get(guild_id)
+        guild = None
+
+        if members is None:
+            guild = self._items[guild_id]
+            guild._members = members = self.__namespace(guild_id)
+
+        members[member.user.id] = member
+
+        if joined:
+            guild = guild or self._items[guild_id]
+
+            if guild.member_count is not None:
+                guild.member_count += 1
+
+        if guild is not None:
+            self.save(guild)
+
+    def delete_member(self, guild_id: int, user_id: int) -> Any:
+        """Remove a member from a cached guild and decrease `member_count`.
+
+        Args:
+            guild_id (int): Guild ID.
+            user_id (int): User ID of the member.
+
+        Returns:
+            Member: Removed member, None if it is not cached.
+        """
+
+        guild = self._items.get(guild_id)
+
+        if guild is None:
+            return None
+
+        if guild.member_count:
+            guild.member_count -= 1
+            self.save(guild)
+
+        members = self._members.get(guild_id)
+
+        return members.pop(user_id, None) if members is not None else None
+
+    def _add_index(self, obj: Any):
+        self._roles[obj.id] = {i.id: i for i in obj.roles or ()}
+        self._emojis[obj.id] = {i.id: i for i in obj.emojis or ()}
+
+    def _remove_index(self, obj: Any):
+        self._roles.pop(obj.id, None)
+        self._emojis.pop(obj.id, None)
+        self._presences.pop(obj.id, None)
+
+        if self._members.pop(obj.id, None) is not None:
+            self.backend.drop(f"members:{obj.id}")
+
+    def _replace_index(self, old: Any, obj: Any):
+        # Members and presences are kept, `upsert` has already updated them.
+        self._add_index(obj)
+
+    def __namespace(self, guild_id: int) -> Any:
+        members = self._members.get(guild_id)
+
+        if members is None:
+            members = self._members[guild_id] = self.backend.namespace(f"members:{guild_id}")
+
+        return members
+
+    def __index_members(self, guild: Any):
+        policy = self.member_policy
+        members = self._members.get(guild.id)
+
+        if not policy.enabled:
+            guild._members = None
+        elif guild._members is None:
+            guild._members = members
+        elif guild._members is not members:
+            new = guild._members
+            members = self.__namespace(guild.id)
+            members.clear()
+            members.update(new if policy.predicate is None else
+                           {key: value for key, value in new.items() if policy.predicate(value)})
+
+            guild._members = members
+
+    def __index_presences(self, guild: Any):
+        policy = self.presence_policy
+
+        if not policy.enabled:
+            return
+        elif guild.presences is None:
+            presences = self._presences.setdefault(guild.id, {})
+            guild.presences = list(presences.values())
+        else:
+            self._presences[guild.id] = {int(i["user"]["id"]): i for i in guild.presences
+                                         if policy.accepts(i)}
+
+
+class ChannelStore(Store):
+    """Channel cache with channels indexed by guild, children by category and threads by parent channel.
+
+    Args:
+        limit (int): Maximum count of channels, None for no limit (default is None).
+        policy (CachePolicy): Cache policy, overrides `limit` (default is None).
+        backend (CacheBackend): Cache backend, the indexes still keep the channels in memory (default is a new `MemoryBackend`).
+    """
+
+    NAMESPACE: str = "channels"
+    THREAD_TYPES: frozenset = frozenset((10, 11, 12))
+
+    def __init__(self, limit: int = None, policy: CachePolicy = None, backend: CacheBackend = None) -> None:
+        super().__init__(limit, policy, backend)
+
+        # Guild / parent ID -> channel ID -> channel.
+        self._guilds: dict = {}
+        self._children: dict = {}
+        self._threads: dict = {}
+
+        # Category ID -> children sorted by position, cleared when the children change.
+        self._sorted: dict = {}
+
+    def guild(self, guild_id: int, threads: bool = False) -> tuple:
+        """Get the channels of a guild.
+
+        Args:
+            guild_id (int): Guild ID.
+            threads (bool, optional): Include threads (default is False).
+
+        Returns:
+            tuple: Channel objects.
+        """
+
+        channels = self._guilds.get(guild_id, {}).values()
+
+        if threads:
+            return tuple(channels)
+
+        return tuple(i for i in channels if i.type not in self.THREAD_TYPES)
+
+    def children(self, category_id: int) -> tuple:
+        """Get the channels of a category, sorted by position.
+
+        Args:
+            category_id (int): Category channel ID.
+
+        Returns:
+            tuple: Channel objects.
+        """
+
+        result = self._sorted.get(category_id)
+
+        if result is None:
+            result = tuple(sorted(self._children.get(category_id, {}).values(),
+                                  key=lambda i: (i.position or 0, i.id)))
+            self._sorted[category_id] = result
+
+        return result
+
+    def threads(self, channel_id: int) -> tuple:
+        """Get the cached threads of a channel.
+
+        Args:
+            channel_id (int): Parent channel ID.
+
+        Returns:
+            tuple: Thread channel objects.
+        """
+
+        return tuple(self._threads.get(channel_id, {}).values())
+
+    def delete_guild(self, guild_id: int) -> int:
+        """Remove all channels and threads of a guild.
+
+        Args:
+            guild_id (int): Guild ID.
+
+        Returns:
+            int: Count of removed channels.
+        """
+
+        channels = self.guild(guild_id, threads=True)
+
+        for channel in channels:
+            self.delete(channel.id)
+
+        return len(channels)
+
+    def _add_index(self, obj: Any):
+        _index_add(self._guilds, obj.guild_id, obj)
+
+        if obj.type in self.THREAD_TYPES:
+            _index_add(self._threads, obj.parent_id, obj)
+        elif obj.parent_id is not None:
+            _index_add(self._children, obj.parent_id, obj)
+            self._sorted.pop(obj.parent_id, None)
+
+    def _remove_index(self, obj: Any):
+        _index_remove(self._guilds, obj.guild_id, obj)
+
+        if obj.type in self.THREAD_TYPES:
+            _index_remove(self._threads, obj.parent_id, obj)
+        elif obj.parent_id is not None:
+            _index_remove(self._children, obj.parent_id, obj)
+            self._sorted.pop(obj.parent_id, None)
+
+
+class MessageStore(Store):
+    """Message cache with a bounded buffer for every channel.
+
+    Every channel keeps its last `channel_limit` messages, so a busy channel can not evict the history of the others.
+    `limit` is the cap for all channels, the policy chooses the message to remove when it is reached.
+    Messages are indexed by ID, so get, update and delete are O(1).
+
+    Args:
+        limit (int): Maximum count of messages in all channels, None for no limit (default is None).
+        channel_limit (int): Maximum count of messages in one channel, None for no limit (default is None).
+        policy (CachePolicy): Cache policy, overrides `limit` (default is None).
+        backend (CacheBackend): Cache backend (default is a new `MemoryBackend`).
+
+    Attributes:
+        limit (int): Maximum count of messages in all channels.
+        channel_limit (int): Maximum count of messages in one channel.
+        channel_limits (dict): Channel ID mapped to the limit of that channel, overrides `channel_limit`.
+    """
+
+    NAMESPACE: str = "messages"
+
+    def __init__(self, limit: int = None, channel_limit: int = None, policy: CachePolicy = None,
+                 backend: CacheBackend = None) -> None:
+        super().__init__(limit, policy, backend)
+
+        self.channel_limit: Union[int, None] = channel_limit
+        self.channel_limits: dict = {}
+
+        # Channel ID -> message IDs, oldest first.
+        self._channels: dict = {}
+
+    def set_channel_limit(self, channel_id: int, limit: Union[int, None]):
+        """Set the message limit of a channel, extra messages are removed.
+
+        Args:
+            channel_id (int): Channel ID.
+            limit (int, None): Maximum count of messages in this channel, None for no limit.
+        """
+
+        self.channel_limits[channel_id] = limit
+        self.__trim(channel_id)
+
+    def channel(self, channel_id: int) -> tuple:
+        """Get the cached messages of a channel.
+
+        Args:
+            channel_id (int): Channel ID.
+
+        Returns:
+            tuple: Messages, oldest first.
+        """
+
+        self._expire()
+        return tuple(self._items[i] for i in self._channels.get(channel_id, ()))
+
+    def delete_channel(self, channel_id: int) -> int:
+        """Remove all messages of a channel.
+
+        Args:
+            channel_id (int): Channel ID.
+
+        Returns:
+            int: Count of removed messages.
+        """
+
+        message_ids = tuple(self._channels.get(channel_id, ()))
+
+        for message_id in message_ids:
+            self.delete(message_id)
+
+        return len(message_ids)
+
+    def _add_index(self, obj: Any):
+        channel = self._channels.get(obj.channel_id)
+
+        if channel is None:
+            channel = self._channels[obj.channel_id] = OrderedDict()
+
+        channel[obj.id] = None
+        self.__trim(obj.channel_id)
+
+    def _remove_index(self, obj: Any):
+        channel = self._channels.get(obj.channel_id)
+
+        if channel is None:
+            return
+
+        channel.pop(obj.id, None)
+
+        if len(channel) == 0:
+            del self._channels[obj.channel_id]
+
+    def _replace_index(self, old: Any, obj: Any):
+        # Message keeps its place in the channel.
+        pass
+
+    def __trim(self, channel_id: int):
+        channel = self._channels.get(channel_id)
+        limit = self.channel_limits.get(channel_id, self.channel_limit)
+
+        if channel is None or limit is None:
+            return
+
+        while channel_id in self._channels and len(channel) > max(limit, 0):
+            self.delete(next(iter(channel)))
+
+
+class UserStore:
+    """Interned User objects by ID.
+
+    Every payload with a user gives the same User object for the same ID, newer payloads update it in place.
+    Users are kept with weak references, so a user is removed when no message, member or other object refers to it.
+
+    Users are kept while they are referenced, so only `enabled` and `predicate` of the policy are used.
+    A disabled store gives a new User object for every payload.
+
+    Args:
+        client (Client): Krema client.
+        policy (CachePolicy): Cache policy, the predicate gets User objects (default is None).
+
+    Examples:
+        >>> client.users.intern({"id": "1", "username": "krema"}) is client.get_user(1)
+        True
+    """
+
+    def __init__(self, client, policy: CachePolicy = None) -> None:
+        self.client = client
+        self.policy: CachePolicy = policy or CachePolicy()
+        self._users: WeakValueDictionary = WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    @property
+    def items(self) -> tuple:
+        """All alive users.
+
+        Returns:
+            tuple: User objects.
+        """
+
+        return tuple(self._users.values())
+
+    def get(self, user_id: int) -> Any:
+        """Get a user by ID.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            User: Found user.
+            None: User is not referenced by anything.
+        """
+
+        return self._users.get(user_id)
+
+    def add(self, user: Any) -> Any:
+        """Add a User object that is not created from a payload, like the users loaded from a cache backend.
+
+        Args:
+            user (User): User object.
+
+        Returns:
+            User: Shared user object, the cached one if there is a user with same ID.
+        """
+
+        cached = self._users.get(user.id)
+
+        if cached is not None:
+            return cached
+
+        if self.policy.accepts(user):
+            self._users[user.id] = user
+
+        return user
+
+    def intern(self, data: dict) -> Any:
+        """Get the shared User object for a payload, created if there is none.
+
+        Args:
+            data (dict): User payload.
+
+        Returns:
+            User: Shared user object, updated with the payload.
+        """
+
+        from .models.user import User
+
+        user = self._users.get(int(data["id"]))
+
+        if user is None:
+            user = User(self.client, data)
+
+            if self.policy.accepts(user):
+                self._users[user.id] = user
+        else:
+            user.patch(data)
+
+        return user
@@ -0,0 +1,166 @@
+"""
+Cache file part of the krema.
+"""
+
+import mmap
+import os
+import struct
+from copy import copy
+
+from . import backends
+
+
+# File layout: header, table of sections, then pickled sections. Offsets are from the start of the file.
+MAGIC: bytes = b"KREMACCH"
+VERSION: int = 1
+
+# Magic, version, section count.
+HEADER: struct.Struct = struct.Struct("<8sHI")
+
+# Section name, offset, length, object count.
+SECTION: struct.Struct = struct.Struct("<16sQQI")
+
+# Sections in load order, channels and messages of a guild are loaded after the guild.
+SECTIONS: tuple = ("guilds", "channels", "messages")
+
+
+def _guild_entries(client) -> list:
+    entries = []
+
+    for guild in client.guilds:
+        members = client.guilds._members.get(guild.id)
+        presences = client.guilds._presences.get(guild.id, guild.presences)
+
+        # Members and presences are stored next to the guild, the guild may only refer to a backend namespace.
+        guild = copy(guild)
+        guild._members = None
+        guild.presences = None
+
+        entries.append((guild, list(members.values()) if members is not None else None,
+                        list(presences.values()) if isinstance(presences, dict) else presences))
+
+    return entries
+
+
+def save(client, path: str) -> dict:
+    """Write the guild, channel and message caches of a client to a file.
+
+    The file is written next to `path` first and then renamed, so a crash never leaves a broken file.
+
+    Args:
+        client (Client): Krema client.
+        path (str): File path.
+
+    Returns:
+        dict: Section name mapped to the count of saved objects.
+    """
+
+    sections = {
+        "guilds": _guild_entries(client),
+        "channels": list(client.channels),
+        "messages": list(client.messages)
+    }
+
+    table_end = HEADER.size + SECTION.size * len(sections)
+    temp_path = f"{path}.tmp"
+
+    with open(temp_path, "wb") as file:
+        file.seek(table_end)
+        table = []
+
+        for name, values in sections.items():
+            offset = file.tell()
+            backends.dump(client.cache_backend, values, file)
+            table.append((name.encode(), offset, file.tell() - offset, len(values)))
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, len(table)))
+
+        for i in table:
+            file.write(SECTION.pack(*i))
+
+        # Data must be on disk before the rename, or a crash can leave an empty file at `path`.
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temp_path, path)
+
+    return {name: len(values) for name, values in sections.items()}
+
+
+def read_table(data) -> dict:
+    """Read the section table of a cache file.
+
+    Args:
+        data (Any): File data, bytes or `mmap.mmap`.
+
+    Returns:
+        dict: Section name mapped to the tuple of offset, length and object count.
+
+    Raises:
+        ValueError: Data is not a cache file of this version.
+    """
+
+    if len(data) < HEADER.size:
+        raise ValueError("Not a krema cache file")
+
+    magic, version, count = HEADER.unpack_from(data, 0)
+
+    if magic != MAGIC:
+        raise ValueError("Not a krema cache file")
+    elif version != VERSION:
+        raise ValueError(f"Unsupported cache file version: {version}")
+
+    table = {}
+
+    for i in range(count):
+        name, offset, length, objects = SECTION.unpack_from(data, HEADER.size + SECTION.size * i)
+        table[name.rstrip(b"\0").decode()] = (offset, length, objects)
+
+    return table
+
+
+def load(client, path: str) -> dict:
+    """Load a file written by `save` into the caches of a client.
+
+    File is memory-mapped and every section is unpickled from the mapping, without reading the file into memory first.
+    Sections are pickle streams, so never load a file from an untrusted source, it can run arbitrary code.
+    Objects are added with the store methods, so the cache policies are applied and cached objects with same ID are replaced.
+
+    Args:
+        client (Client): Krema client.
+        path (str): File path.
+
+    Returns:
+        dict: Section name mapped to the count of loaded objects.
+
+    Raises:
+        ValueError: File is not a cache file of this version.
+    """
+
+    counts = {}
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        table = read_table(data)
+
+        for name in SECTIONS:
+            if name not in table:
+                continue
+
+            data.seek(table[name][0])
+            values = backends.load(client.cache_backend, data)
+            counts[name] = len(values)
+
+            if name == "guilds":
+                for guild, members, presences in values:
+                    guild._members = {i.user.id: i for i in members} if members is not None else None
+                    guild.presences = presences
+                    client.guilds.upsert(guild)
+            elif name == "channels":
+                for channel in values:
+                    client.channels.upsert(channel)
+            else:
+                for message in values:
+                    client.messages.upsert(message)
+
+    return counts
@@ -0,0 +1,167 @@
+"""
+Transport compression part of the krema.
+"""
+
+from typing import Union
+from zlib import decompressobj
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ZlibStream:
+    """Inflater for `zlib-stream` transport compression, the default one.
+
+    A message is complete when it ends with the `Z_SYNC_FLUSH` suffix. Complete frames are decompressed directly,
+    frames of split messages are collected in a preallocated buffer that is reused for every message.
+
+    Args:
+        buffer_size (int): Initial size of the buffer for split messages in bytes (default is 64 KiB).
+    """
+
+    NAME: str = "zlib-stream"
+    SUFFIX: bytes = b'\x00\x00\xff\xff'
+
+    def __init__(self, buffer_size: int = 64 * 1024) -> None:
+        self._zlib = decompressobj()
+        self._buffer: bytearray = bytearray(buffer_size)
+        self._length: int = 0
+
+    def reset(self):
+        """Start a new stream, must be called for every new connection."""
+
+        self._zlib = decompressobj()
+        self._length = 0
+
+    def feed(self, data: bytes) -> Union[bytes, None]:
+        """Add a frame to the stream.
+
+        Args:
+            data (bytes): Frame received from websocket.
+
+        Returns:
+            bytes: Decompressed message.
+            None: Message is not complete yet.
+        """
+
+        # Complete message in one frame, no need to copy.
+        if self._length == 0 and data.endswith(self.SUFFIX):
+            return self._zlib.decompress(data)
+
+        self.__append(data)
+
+        end = self._length
+
+        if end < 4 or self._buffer[end - 4:end] != self.SUFFIX:
+            return None
+
+        self._length = 0
+
+        with memoryview(self._buffer) as view:
+            with view[:end] as message:
+                return self._zlib.decompress(message)
+
+    def __append(self, data: bytes):
+        end = self._length + len(data)
+
+        # Grow the buffer by doubling its size.
+        if end > len(self._buffer):
+            self._buffer.extend(
+                bytes(max(end - len(self._buffer), len(self._buffer))))
+
+        self._buffer[self._length:end] = data
+        self._length = end
+
+
+class ZstdStream:
+    """Inflater for `zstd-stream` transport compression.
+
+    Every message is flushed by Discord, so each frame is decompressed as it arrives.
+    Needs `zstandard` module.
+
+    Raises:
+        ImportError: `zstandard` module is not installed.
+    """
+
+    NAME: str = "zstd-stream"
+
+    def __init__(self) -> None:
+        if zstandard is None:
+            raise ImportError(
+                "zstandard module is required for zstd-stream compression, install it with `pip install zstandard`.")
+
+        self._zstd = zstandard.ZstdDecompressor().decompressobj()
+
+    def reset(self):
+        """Start a new stream, must be called for every new connection."""
+
+        self._zstd = zstandard.ZstdDecompressor().decompressobj()
+
+    def feed(self, data: bytes) -> Union[bytes, None]:
+        """Add a frame to the stream.
+
+        Args:
+            data (bytes): Frame received from websocket.
+
+        Returns:
+            bytes: Decompressed message.
+            None: Message is not complete yet.
+        """
+
+        return self._zstd.decompress(data) or None
+
+
+class NoCompression:
+    """Pass-through inflater for connections without transport compression.
+
+    Uses no CPU for decompressing, but needs several times more bandwidth.
+    """
+
+    NAME: None = None
+
+    def reset(self):
+        """Nothing to reset, exists for same interface with other inflaters."""
+
+        pass
+
+    def feed(self, data: Union[bytes, str]) -> Union[bytes, str]:
+        """Return the frame as is, every frame is a complete message.
+
+        Args:
+            data (bytes, str): Frame received from websocket.
+
+        Returns:
+            bytes, str: Same message.
+        """
+
+        return data
+
+
+# Compression name in gateway URL -> inflater class.
+COMPRESSIONS: dict = {
+    ZlibStream.NAME: ZlibStream,
+    ZstdStream.NAME: ZstdStream,
+    NoCompression.NAME: NoCompression
+}
+
+
+def get_inflater(compress: Union[str, None]):
+    """Create an inflater for transport compression.
+
+    Args:
+        compress (str, None): "zlib-stream", "zstd-stream" or None for no compression.
+
+    Returns:
+        ZlibStream, ZstdStream, NoCompression: Inflater object.
+
+    Raises:
+        ValueError: Unknown compression.
+        ImportError: Module for the compression is not installed.
+    """
+
+    if compress not in COMPRESSIONS:
+        raise ValueError(f"Unsupported gateway compression: {compress}")
+
+    return COMPRESSIONS[compress]()
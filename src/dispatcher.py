@@ -0,0 +1,238 @@
+"""
+Event dispatcher part of the krema.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import Callable, Union
+import traceback
+import sys
+
+
+# Events that carry the guild ID in the `id` field.
+GUILD_EVENTS: frozenset = frozenset(
+    ("guild_create", "guild_update", "guild_delete"))
+
+
+def partition_key(event_data, event_type: str):
+    """Get the ordering key of an event from the raw payload.
+
+    Args:
+        event_data: Event data from gateway.
+        event_type (str): Event name in lowercase.
+
+    Returns:
+        str, int: Guild ID, or channel ID for DM events.
+        None: Event is not bound to a guild or channel.
+    """
+
+    if not isinstance(event_data, dict):
+        return None
+
+    if event_type in GUILD_EVENTS:
+        return event_data.get("id")
+
+    return event_data.get("guild_id") or event_data.get("channel_id")
+
+
+# Events that carry the channel ID in the `id` field.
+CHANNEL_EVENTS: frozenset = frozenset(
+    ("channel_create", "channel_update", "channel_delete", "thread_create", "thread_update", "thread_delete"))
+
+
+def scope_ids(event_data, event_type: str) -> tuple:
+    """Get guild and channel IDs of an event from the raw payload, used for scoped handlers.
+
+    Args:
+        event_data: Event data from gateway.
+        event_type (str): Event name in lowercase.
+
+    Returns:
+        tuple: Guild ID and channel ID as int, None when the event has no such ID.
+    """
+
+    if not isinstance(event_data, dict):
+        return None, None
+
+    guild_id = event_data.get("id") if event_type in GUILD_EVENTS else event_data.get("guild_id")
+    channel_id = event_data.get("id") if event_type in CHANNEL_EVENTS else event_data.get("channel_id")
+
+    return int(guild_id) if guild_id else None, int(channel_id) if channel_id else None
+
+
+class Dispatcher:
+    """Bounded event queues consumed by a pool of workers.
+
+    When `ordered` is True, every worker has its own queue (lane) and events are routed to a lane by guild ID
+    (or channel ID for DMs). So events of one guild are handled in order, while different guilds are handled in parallel.
+    Events without a guild or channel use the first lane.
+    When `ordered` is False, all workers consume a shared queue and events are handled fully concurrent.
+
+    Args:
+        handler (Callable): Coroutine function that handles one event, called with `(event_data, event_type)`.
+        workers (int): Worker count (default is 8).
+        queue_size (int): Maximum count of queued events. In ordered mode it is split between lanes, every lane holds `queue_size // workers` events (at least 1) and receiving waits when the lane of an event is full (default is 1000).
+        timeout (float, None): Timeout for each event handler in seconds (default is None).
+        ordered (bool): Keep the order of events in same guild (default is True).
+
+    Attributes:
+        workers (int): Worker count.
+        queue_size (int): Maximum count of queued events, for all lanes together.
+        timeout (float, None): Timeout for each event handler in seconds.
+        ordered (bool): Keep the order of events in same guild.
+        metrics (dict): Counts of queued, processed, failed and timed out events, how many times the queue was full (backpressure), the highest queue size (max_pending) and total handling time in seconds.
+    """
+
+    def __init__(self, handler: Callable, workers: int = 8, queue_size: int = 1000,
+                 timeout: Union[float, None] = None, ordered: bool = True) -> None:
+        self.handler: Callable = handler
+        self.workers: int = workers
+        self.queue_size: int = queue_size
+        self.timeout: Union[float, None] = timeout
+        self.ordered: bool = ordered
+
+        self.metrics: dict = {
+            "queued": 0,
+            "processed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "backpressure": 0,
+            "max_pending": 0,
+            "handle_time": 0.0
+        }
+
+        self._queues: list = []
+        self._tasks: list = []
+        self._blocked: bool = False
+
+    @property
+    def pending(self) -> int:
+        """Count of events waiting in the queue.
+
+        Returns:
+            int: Queued event count.
+        """
+
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def blocked(self) -> bool:
+        """Whether receiving is waiting for free space in the queue.
+
+        Returns:
+            bool: True if the queue is full and the receiver is waiting.
+        """
+
+        return self._blocked
+
+    def start(self):
+        """Start the worker pool, does nothing if workers are already running."""
+
+        if self._tasks:
+            return
+
+        loop = asyncio.get_event_loop()
+
+        if self.ordered:
+            self._queues = [asyncio.Queue(maxsize=max(1, self.queue_size // self.workers))
+                            for _ in range(self.workers)]
+            self._tasks = [loop.create_task(self.__worker(queue))
+                           for queue in self._queues]
+        else:
+            self._queues = [asyncio.Queue(maxsize=self.queue_size)]
+            self._tasks = [loop.create_task(self.__worker(self._queues[0]))
+                           for _ in range(self.workers)]
+
+    def stop(self):
+        """Cancel the worker pool, queued events are dropped."""
+
+        for task in self._tasks:
+            task.cancel()
+
+        self._tasks, self._queues = [], []
+
+    async def put(self, event_data, event_type: str):
+        """Queue an event, waits while the queue is full.
+
+        Args:
+            event_data: Event data from gateway.
+            event_type (str): Event name in lowercase.
+        """
+
+        if self.ordered:
+            key = partition_key(event_data, event_type)
+            queue = self._queues[hash(key) % self.workers if key is not None else 0]
+        else:
+            queue = self._queues[0]
+
+        if queue.full():
+            self.metrics["backpressure"] += 1
+            self._blocked = True
+
+            try:
+                await queue.put((event_data, event_type))
+            finally:
+                self._blocked = False
+        else:
+            queue.put_nowait((event_data, event_type))
+
+        self.metrics["queued"] += 1
+
+        pending = self.pending
+
+        if pending > self.metrics["max_pending"]:
+            self.metrics["max_pending"] = pending
+
+    async def run(self, coro):
+        """Run an event handler with the timeout, errors are printed instead of raised.
+
+        Args:
+            coro (Coroutine): Event handler coroutine.
+        """
+
+        try:
+            if self.timeout is None:
+                await coro
+            else:
+                await asyncio.wait_for(coro, self.timeout)
+        except asyncio.TimeoutError:
+            self.metrics["timed_out"] += 1
+            print("Event handler timed out after {0} seconds: {1}".format(
+                self.timeout, getattr(coro, "__qualname__", coro)), file=sys.stderr)
+        except Exception as error:
+            self.metrics["failed"] += 1
+            self.print_error(error)
+
+    async def __worker(self, queue: asyncio.Queue):
+        """Handle queued events one by one."""
+
+        while True:
+            event_data, event_type = await queue.get()
+            started = perf_counter()
+
+            try:
+                await self.handler(event_data, event_type)
+            except Exception as error:
+                self.metrics["failed"] += 1
+                self.print_error(error)
+            finally:
+                queue.task_done()
+
+            self.metrics["processed"] += 1
+            self.metrics["handle_time"] += perf_counter() - started
+
+    def print_error(self, error: Exception):
+        """Print an error of an event handler to stderr.
+
+        Args:
+            error (Exception): Raised error.
+        """
+
+        error = getattr(error, 'original', error)
+        print("Unexcepted error while handling the event: ",
+              file=sys.stderr)
+        traceback.print_exception(
+            type(error),
+            error,
+            error.__traceback__,
+            file=sys.stderr)
@@ -0,0 +1,258 @@
+"""
+Erlang Term Format (ETF) part of the krema.
+
+Decodes gateway payloads into the same shape as JSON: atoms and binaries become `str`,
+`nil`, `true` and `false` become `None`, `True` and `False`, maps become `dict` and lists become `list`.
+Erlang strings (STRING_EXT) are lists of small integers, so they are decoded as `list` of `int` like other lists.
+Snowflakes are sent as integers by Discord, so they are decoded as `int`.
+"""
+
+from struct import Struct, error as StructError
+from typing import Any, Tuple
+from zlib import decompress, error as ZlibError
+
+VERSION: int = 131
+
+NEW_FLOAT_EXT: int = 70
+COMPRESSED: int = 80
+SMALL_INTEGER_EXT: int = 97
+INTEGER_EXT: int = 98
+FLOAT_EXT: int = 99
+ATOM_EXT: int = 100
+SMALL_TUPLE_EXT: int = 104
+LARGE_TUPLE_EXT: int = 105
+NIL_EXT: int = 106
+STRING_EXT: int = 107
+LIST_EXT: int = 108
+BINARY_EXT: int = 109
+SMALL_BIG_EXT: int = 110
+LARGE_BIG_EXT: int = 111
+SMALL_ATOM_EXT: int = 115
+MAP_EXT: int = 116
+ATOM_UTF8_EXT: int = 118
+SMALL_ATOM_UTF8_EXT: int = 119
+
+_UINT16 = Struct(">H")
+_UINT32 = Struct(">I")
+_INT32 = Struct(">i")
+_DOUBLE = Struct(">d")
+
+_ATOMS: dict = {"nil": None, "true": True, "false": False}
+
+
+def loads(data: bytes) -> Any:
+    """Decode an ETF payload.
+
+    Args:
+        data (bytes): ETF payload, starts with the version byte.
+
+    Returns:
+        Any: Decoded term.
+
+    Raises:
+        ValueError: Payload is not valid ETF.
+
+    Examples:
+        >>> krema.etf.loads(b"\\x83t\\x00\\x00\\x00\\x01d\\x00\\x02opa\\x0b")
+        {"op": 11}
+    """
+
+    if len(data) == 0 or data[0] != VERSION:
+        raise ValueError("Unsupported ETF version.")
+
+    try:
+        result, offset = _decode(data, 1)
+    except (IndexError, KeyError, StructError, ZlibError) as error:
+        raise ValueError("Invalid ETF payload.") from error
+
+    # Slices don't fail on truncated binaries, the offset goes past the end instead.
+    if offset > len(data):
+        raise ValueError("Invalid ETF payload.")
+
+    return result
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object to ETF.
+
+    Args:
+        obj (Any): Object with None, bool, int, float, str, bytes, list, tuple and dict values.
+
+    Returns:
+        bytes: ETF payload.
+
+    Raises:
+        TypeError: Object has a value that can not be encoded.
+    """
+
+    buffer = bytearray((VERSION, ))
+    _encode(obj, buffer)
+
+    return bytes(buffer)
+
+
+def _decode_atom(data: bytes, offset: int, length: int) -> Tuple[Any, int]:
+    name = data[offset:offset + length].decode("utf-8")
+    return _ATOMS.get(name, name), offset + length
+
+
+def _decode(data: bytes, offset: int) -> Tuple[Any, int]:
+    tag = data[offset]
+    offset += 1
+
+    if tag == BINARY_EXT:
+        length = _UINT32.unpack_from(data, offset)[0]
+        offset += 4
+        return data[offset:offset + length].decode("utf-8"), offset + length
+
+    elif tag == SMALL_INTEGER_EXT:
+        return data[offset], offset + 1
+
+    elif tag == INTEGER_EXT:
+        return _INT32.unpack_from(data, offset)[0], offset + 4
+
+    elif tag == MAP_EXT:
+        arity = _UINT32.unpack_from(data, offset)[0]
+        offset += 4
+        result = {}
+
+        for _ in range(arity):
+            key, offset = _decode(data, offset)
+            result[key], offset = _decode(data, offset)
+
+        return result, offset
+
+    elif tag in (SMALL_ATOM_UTF8_EXT, SMALL_ATOM_EXT):
+        return _decode_atom(data, offset + 1, data[offset])
+
+    elif tag in (ATOM_UTF8_EXT, ATOM_EXT):
+        return _decode_atom(data, offset + 2, _UINT16.unpack_from(data, offset)[0])
+
+    elif tag == NIL_EXT:
+        return [], offset
+
+    elif tag == LIST_EXT:
+        length = _UINT32.unpack_from(data, offset)[0]
+        offset += 4
+        result = [None] * length
+
+        for index in range(length):
+            result[index], offset = _decode(data, offset)
+
+        # Proper lists end with NIL_EXT tail.
+        tail, offset = _decode(data, offset)
+
+        if tail != []:
+            result.append(tail)
+
+        return result, offset
+
+    elif tag in (SMALL_BIG_EXT, LARGE_BIG_EXT):
+        if tag == SMALL_BIG_EXT:
+            length = data[offset]
+            offset += 1
+        else:
+            length = _UINT32.unpack_from(data, offset)[0]
+            offset += 4
+
+        sign = data[offset]
+        offset += 1
+        value = int.from_bytes(data[offset:offset + length], "little")
+
+        return -value if sign else value, offset + length
+
+    elif tag == STRING_EXT:
+        length = _UINT16.unpack_from(data, offset)[0]
+        offset += 2
+        return list(data[offset:offset + length]), offset + length
+
+    elif tag == NEW_FLOAT_EXT:
+        return _DOUBLE.unpack_from(data, offset)[0], offset + 8
+
+    elif tag == FLOAT_EXT:
+        return float(data[offset:offset + 31].split(b"\x00", 1)[0]), offset + 31
+
+    elif tag in (SMALL_TUPLE_EXT, LARGE_TUPLE_EXT):
+        if tag == SMALL_TUPLE_EXT:
+            arity = data[offset]
+            offset += 1
+        else:
+            arity = _UINT32.unpack_from(data, offset)[0]
+            offset += 4
+
+        result = [None] * arity
+
+        for index in range(arity):
+            result[index], offset = _decode(data, offset)
+
+        return tuple(result), offset
+
+    elif tag == COMPRESSED:
+        size = _UINT32.unpack_from(data, offset)[0]
+        inflated = decompress(data[offset + 4:])
+
+        if len(inflated) != size:
+            raise ValueError("Invalid compressed ETF term.")
+
+        return _decode(inflated, 0)[0], len(data)
+
+    raise ValueError(f"Unsupported ETF tag: {tag}.")
+
+
+def _encode(obj: Any, buffer: bytearray):
+    if obj is None or obj is True or obj is False:
+        name = b"nil" if obj is None else b"true" if obj else b"false"
+        buffer.append(SMALL_ATOM_UTF8_EXT)
+        buffer.append(len(name))
+        buffer += name
+
+    elif isinstance(obj, int):
+        if 0 <= obj <= 255:
+            buffer.append(SMALL_INTEGER_EXT)
+            buffer.append(obj)
+        elif -2 ** 31 <= obj < 2 ** 31:
+            buffer.append(INTEGER_EXT)
+            buffer += _INT32.pack(obj)
+        else:
+            digits = abs(obj).to_bytes((abs(obj).bit_length() + 7) // 8, "little")
+
+            if len(digits) <= 255:
+                buffer.append(SMALL_BIG_EXT)
+                buffer.append(len(digits))
+            else:
+                buffer.append(LARGE_BIG_EXT)
+                buffer += _UINT32.pack(len(digits))
+
+            buffer.append(1 if obj < 0 else 0)
+            buffer += digits
+
+    elif isinstance(obj, float):
+        buffer.append(NEW_FLOAT_EXT)
+        buffer += _DOUBLE.pack(obj)
+
+    elif isinstance(obj, (str, bytes, bytearray)):
+        value = obj.encode("utf-8") if isinstance(obj, str) else obj
+        buffer.append(BINARY_EXT)
+        buffer += _UINT32.pack(len(value))
+        buffer += value
+
+    elif isinstance(obj, dict):
+        buffer.append(MAP_EXT)
+        buffer += _UINT32.pack(len(obj))
+
+        for key, value in obj.items():
+            _encode(key, buffer)
+            _encode(value, buffer)
+
+    elif isinstance(obj, (list, tuple)):
+        if len(obj) != 0:
+            buffer.append(LIST_EXT)
+            buffer += _UINT32.pack(len(obj))
+
+            for value in obj:
+                _encode(value, buffer)
+
+        buffer.append(NIL_EXT)
+
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not ETF serializable.")
@@ -3,15 +3,283 @@ Gateway part of the krema.
 """
 
 import asyncio
-from json import loads
+from collections import deque
+from itertools import count
+from math import ceil
+from json import dumps, loads
+from random import random
+from time import perf_counter
 from typing import Union
-from zlib import decompressobj
-import traceback
 import sys
 
 import aiohttp
 
-from .models import Interaction, ApplicationCommand, User, Message, Channel, Guild, Role, Emoji, Sticker, Member, Integration
+from . import etf
+from .compression import get_inflater
+from .dispatcher import Dispatcher
+from .ratelimit import CommandLimiter, SendQueue
+from .ready import ReadyTracker
+from .utils import Snapshot
+from .models import Interaction, ApplicationCommand, Message, Channel, Guild, Role, Emoji, Sticker, Member, Integration
+
+
+# Markers of DISPATCH payload start, for bytes and str payloads.
+_PEEK_MARKERS: dict = {
+    bytes: (b'{"t":"', b'"', b'","s":', b',"op":0,'),
+    str: ('{"t":"', '"', '","s":', ',"op":0,')
+}
+
+
+def peek_dispatch(message: Union[bytes, str]) -> tuple:
+    """Read event name and sequence of a DISPATCH payload without decoding it.
+
+    Discord sends the top-level keys in `t, s, op, d` order, so both are found at the start of the payload.
+    Payloads in any other shape are left for the JSON decoder.
+
+    Args:
+        message (bytes, str): Decompressed JSON payload, str for uncompressed text frames.
+
+    Returns:
+        tuple: Event name (same type with message) and sequence (int), `(None, None)` if the payload is not a DISPATCH in the expected shape.
+
+    Examples:
+        >>> krema.gateway.peek_dispatch(b'{"t":"TYPING_START","s":42,"op":0,"d":{}}')
+        (b"TYPING_START", 42)
+    """
+
+    start, quote, seq_marker, op_marker = _PEEK_MARKERS[type(message)]
+
+    if not message.startswith(start):
+        return None, None
+
+    name_end = message.find(quote, 6, 70)
+
+    if name_end == -1 or message[name_end:name_end + 6] != seq_marker:
+        return None, None
+
+    seq_end = message.find(op_marker, name_end + 6, name_end + 32)
+
+    if seq_end == -1:
+        return None, None
+
+    try:
+        seq = int(message[name_end + 6:seq_end])
+    except ValueError:
+        return None, None
+
+    return message[6:name_end], seq
+
+
+def _snowflake(data: dict, key: str) -> Union[int, None]:
+    return int(data[key]) if data.get(key) else None
+
+
+def _decode_raw(client, data):
+    return (data, )
+
+
+def _decode_message(client, data):
+    return (Message(client, data), )
+
+
+def _decode_message_update(client, data):
+    # Embed-only updates don't have the message fields.
+    if len(data) == 4:
+        return None
+
+    return (Message(client, data), )
+
+
+def _decode_guild(client, data):
+    return (Guild(client, data), )
+
+
+def _decode_channel(client, data):
+    return (Channel(client, data), )
+
+
+def _decode_interaction(client, data):
+    return (Interaction(client, data), )
+
+
+def _decode_application_command(client, data):
+    return (ApplicationCommand(client, data), )
+
+
+def _decode_guild_ban(client, data):
+    usr_obj = client.users.intern(data["user"]) if data.get("user") else None
+    return (_snowflake(data, "guild_id"), usr_obj, )
+
+
+def _decode_guild_emojis(client, data):
+    emojis_obj = [Emoji(client, i) for i in data["emojis"]] if data.get("emojis") else None
+    return (_snowflake(data, "guild_id"), emojis_obj, )
+
+
+def _decode_guild_stickers(client, data):
+    stickers_obj = [Sticker(client, i) for i in data["stickers"]] if data.get("stickers") else None
+    return (_snowflake(data, "guild_id"), stickers_obj, )
+
+
+def _decode_guild_integration(client, data):
+    return (_snowflake(data, "guild_id"), )
+
+
+def _decode_guild_member(client, data):
+    return (_snowflake(data, "guild_id"), Member(client, data), )
+
+
+def _decode_guild_member_remove(client, data):
+    usr_obj = client.users.intern(data["user"]) if data.get("user") else None
+    return (_snowflake(data, "guild_id"), usr_obj, )
+
+
+def _decode_guild_role(client, data):
+    role_obj = Role(data["role"]) if data.get("role") else None
+    return (_snowflake(data, "guild_id"), role_obj, )
+
+
+def _decode_guild_role_delete(client, data):
+    return (_snowflake(data, "guild_id"), _snowflake(data, "role_id"), )
+
+
+def _decode_integration(client, data):
+    return (_snowflake(data, "guild_id"), Integration(client, data), )
+
+
+def _decode_integration_delete(client, data):
+    return (_snowflake(data, "id"), _snowflake(data, "guild_id"), _snowflake(data, "application_id"), )
+
+
+def _patch_message(client, data, snapshot):
+    message = client.messages.get(int(data["id"]))
+
+    if message is None:
+        return None
+
+    # Author is an interned user, USER_UPDATE and member payloads change it in place.
+    before = Snapshot(message, nested=("author", )) if snapshot else None
+    message.patch(data)
+
+    return before, (message, )
+
+
+def _patch_guild_member(client, data, snapshot):
+    guild = client.get_guild(_snowflake(data, "guild_id"))
+    member = guild.get_member(int(data["user"]["id"])) if guild is not None and data.get("user") else None
+
+    if member is None:
+        return None
+
+    # User is interned, the patch below changes it in place.
+    before = Snapshot(member, nested=("user", )) if snapshot else None
+    member.patch(data)
+
+    return before, (guild.id, member, )
+
+
+def _replace_guild(client, data, snapshot):
+    # Cache replaces the guild, so the cached object is the previous state as is.
+    before = client.get_guild(int(data["id"]))
+    return (before, _decode_guild(client, data)) if before is not None else None
+
+
+def _replace_channel(client, data, snapshot):
+    before = client.get_channel(int(data["id"]))
+    return (before, _decode_channel(client, data)) if before is not None else None
+
+
+# Event name -> function that applies an update to the cached object, or builds the replacement of it.
+# Returns the state before the update (when `snapshot` is True, or when it costs nothing) and handler arguments,
+# None if the object is not cached.
+PATCHERS: dict = {
+    "message_update": _patch_message,
+    "guild_member_update": _patch_guild_member,
+    "guild_update": _replace_guild,
+    "channel_update": _replace_channel,
+    "thread_update": _replace_channel
+}
+
+
+# Event name -> function that converts event data to handler arguments.
+# Events that are not in the table are sent as raw dict.
+DECODERS: dict = {
+    "message_create": _decode_message,
+    "message_update": _decode_message_update,
+    "guild_create": _decode_guild,
+    "guild_update": _decode_guild,
+    "channel_create": _decode_channel,
+    "channel_update": _decode_channel,
+    "channel_delete": _decode_channel,
+    "thread_create": _decode_channel,
+    "thread_update": _decode_channel,
+    "interaction_create": _decode_interaction,
+    "application_command_create": _decode_application_command,
+    "application_command_update": _decode_application_command,
+    "application_command_delete": _decode_application_command,
+    "guild_ban_add": _decode_guild_ban,
+    "guild_ban_remove": _decode_guild_ban,
+    "guild_emojis_update": _decode_guild_emojis,
+    "guild_stickers_update": _decode_guild_stickers,
+    "guild_integration_update": _decode_guild_integration,
+    "guild_member_add": _decode_guild_member,
+    "guild_member_update": _decode_guild_member,
+    "guild_member_remove": _decode_guild_member_remove,
+    "guild_role_create": _decode_guild_role,
+    "guild_role_update": _decode_guild_role,
+    "guild_role_delete": _decode_guild_role_delete,
+    "integration_create": _decode_integration,
+    "integration_update": _decode_integration,
+    "integration_delete": _decode_integration_delete
+}
+
+
+class ChunkResult:
+    """Result of a REQUEST_GUILD_MEMBERS request, iterating it gives the members.
+
+    Args:
+        guild_id (int): Guild ID.
+
+    Attributes:
+        guild_id (int): Guild ID.
+        members (list): Received Member objects.
+        presences (list): Received presence payloads (when presences are requested).
+        not_found (list): User IDs that are not found in the guild.
+    """
+
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id: int = guild_id
+
+        self.members: list = []
+        self.presences: list = []
+        self.not_found: list = []
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+
+class ChunkRequest:
+    """Pending REQUEST_GUILD_MEMBERS request, filled by GUILD_MEMBERS_CHUNK events with same nonce.
+
+    Args:
+        guild_id (int): Guild ID.
+        future (asyncio.Future): Future that is resolved with the result when the last chunk arrives.
+
+    Attributes:
+        future (asyncio.Future): Future that is resolved with the result when the last chunk arrives.
+        result (ChunkResult): Received members, presences and not found user IDs.
+        sent (bool): Whether the request is sent, requests in the send queue are sent again after a reconnect.
+    """
+
+    def __init__(self, guild_id: int, future: asyncio.Future) -> None:
+        self.future: asyncio.Future = future
+        self.result: ChunkResult = ChunkResult(guild_id)
+        self.sent: bool = False
+
+        self._received: int = 0
 
 
 class Gateway:
@@ -35,49 +303,230 @@ class Gateway:
     HEARTBEAT_ACK: int = 11
     GUILD_SYNC: int = 12
 
+    # Events handled by the receiver itself, before they are queued for the handlers.
+    RECEIVER_EVENTS: frozenset = frozenset(("ready", "resumed", "guild_members_chunk"))
+
+    LATENCY_SAMPLES: int = 100
+    LATENCY_BUCKETS: tuple = (50, 100, 250, 500, 1000, 2500)
+
     def __init__(self, client) -> None:
         from .models.client import Client
 
         self.client: Client = client
         self.token: str = self.client.formatted_token
 
-        self.gateway: str = "wss://gateway.discord.gg/?v=9&encoding=json&compress=zlib-stream"
+        self.encoding: str = self.client.encoding
+
+        if self.encoding not in ("json", "etf"):
+            raise ValueError(f"Unsupported gateway encoding: {self.encoding}")
+
+        self._inflater = get_inflater(self.client.compress)
+
+        self.gateway: str = f"wss://gateway.discord.gg/?v=9&encoding={self.encoding}"
+
+        if self.client.compress is not None:
+            self.gateway += f"&compress={self.client.compress}"
         self.websocket = None
 
-        self._buffer: bytearray = bytearray()
-        self._zlib = decompressobj()
         self._session: Union[aiohttp.ClientSession, None] = None
 
         self._seq: Union[int, None] = None
         self._session_id: Union[str, None] = None
 
+        self._heartbeat_task: Union[asyncio.Task, None] = None
+        self._heartbeat_interval: Union[float, None] = None
+        self._last_heartbeat: Union[float, None] = None
+        self._ack_received: bool = True
+        self._latencies: deque = deque(maxlen=self.LATENCY_SAMPLES)
+        self._reconnect: bool = False
+
         self._event_loop = asyncio.get_event_loop()
 
-        self.client.events.append(
-            ("ready", self.__handle_session_id)
-        )
+        self.dispatcher: Dispatcher = Dispatcher(
+            self.__handle_event,
+            workers=self.client.dispatch_workers,
+            queue_size=self.client.dispatch_queue_size,
+            timeout=self.client.handler_timeout,
+            ordered=self.client.ordered_dispatch)
+
+        self._decoders: dict = dict(DECODERS)
+        self._patchers: dict = dict(PATCHERS)
+
+        # ID of the event data -> event data, previous state and handler arguments built for the waiters.
+        self._built_args: dict = {}
+
+        self.limiter: CommandLimiter = CommandLimiter()
+        self._send_queue: SendQueue = SendQueue(self.__write, self.limiter)
+
+        self._chunk_requests: dict = {}
+        self._chunk_nonce = count()
+
+        self.ready_tracker: ReadyTracker = ReadyTracker(
+            self.__handle_guilds_ready, timeout=self.client.guild_ready_timeout)
+
+
+    @property
+    def latency(self) -> float:
+        """Latency between the last heartbeat and its ACK in seconds.
+
+        Returns:
+            float: Latency in seconds, `float("inf")` if no ACK has been received yet.
+        """
+
+        return self._latencies[-1] if self._latencies else float("inf")
+
+    @property
+    def average_latency(self) -> float:
+        """Average latency of the last `LATENCY_SAMPLES` heartbeats in seconds.
+
+        Returns:
+            float: Average latency in seconds, `float("inf")` if no ACK has been received yet.
+        """
+
+        if not self._latencies:
+            return float("inf")
+
+        return sum(self._latencies) / len(self._latencies)
+
+    @property
+    def latency_histogram(self) -> dict:
+        """Rolling histogram of the last `LATENCY_SAMPLES` heartbeat latencies.
+
+        Returns:
+            dict: Upper bound of each bucket in milliseconds (`None` for the overflow bucket) mapped to the sample count.
+
+        Examples:
+            >>> client.connection.latency_histogram
+            {50: 12, 100: 80, 250: 7, 500: 1, 1000: 0, 2500: 0, None: 0}
+        """
+
+        histogram = dict.fromkeys((*self.LATENCY_BUCKETS, None), 0)
+
+        for latency in self._latencies:
+            latency *= 1000
+
+            for bucket in self.LATENCY_BUCKETS:
+                if latency <= bucket:
+                    histogram[bucket] += 1
+                    break
+            else:
+                histogram[None] += 1
+
+        return histogram
 
     async def __connect(self):
         """Start WebSocket connection."""
 
+        self.__stop_heartbeat()
+        self._send_queue.close()
+        self.__fail_chunk_requests()
         self.websocket, self._session = None, None
+        self._reconnect = False
+
+        # Every connection starts a new compression stream.
+        self._inflater.reset()
 
         self._session = aiohttp.ClientSession()
         self.websocket = await self._session.ws_connect(self.gateway)
 
-        # Send Resume
-        if self._session_id is not None:
-            await self.websocket.send_json({
-                "op": 6,
-                "d": {
-                    "token": self.token,
-                    "session_id": self._session_id,
-                    "seq": self._seq
-                }
-            })
+    async def __resume(self):
+        """Resume the last session, the missed events are replayed before RESUMED."""
+
+        await self.__send_now({
+            "op": self.RESUME,
+            "d": {
+                "token": self.token,
+                "session_id": self._session_id,
+                "seq": self._seq
+            }
+        })
+
+    def __handle_member_chunk(self, packet):
+        """Collect a GUILD_MEMBERS_CHUNK, called from the receiver so a handler that waits for the chunks doesn't block them."""
+
+        guild_id = int(packet["guild_id"])
+        members = [Member(self.client, i) for i in packet.get("members", ())]
+        presences = packet.get("presences") or []
+        request = self._chunk_requests.get(packet.get("nonce"))
+
+        # Chunks of unknown requests go to cache directly.
+        if request is None:
+            self.__cache_members(guild_id, members, presences)
+            return
+
+        result = request.result
+        result.members.extend(members)
+        result.presences.extend(presences)
+        result.not_found.extend(int(i) for i in packet.get("not_found", ()))
+        request._received += 1
+
+        if request._received >= packet.get("chunk_count", 1):
+            del self._chunk_requests[packet["nonce"]]
+            self.__cache_members(guild_id, result.members, result.presences)
+
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def __cache_members(self, guild_id: int, members: list, presences: list):
+        """Merge members and presences into the cached guild."""
+
+        for member in members:
+            self.client.guilds.upsert_member(guild_id, member)
+
+        for presence in presences:
+            self.client.guilds.update_presence(guild_id, presence)
+
+    def __fail_chunk_requests(self):
+        """Fail the sent member requests, their chunks never arrive on a new connection."""
+
+        for request in self._chunk_requests.values():
+            if request.sent and not request.future.done():
+                request.future.set_exception(
+                    ConnectionResetError("Gateway connection was closed before all member chunks were received"))
+
+    async def request_members(self, guild_id: int, user_ids: list = None, query: str = None, limit: int = 0,
+                              presences: bool = False, timeout: float = 60.0) -> ChunkResult:
+        """Request guild members over gateway (REQUEST_GUILD_MEMBERS) and wait for all chunks.
+
+        Args:
+            guild_id (int): Guild ID.
+            user_ids (list, optional): List of user IDs to fetch.
+            query (str, optional): Username prefix to search, empty string (default) requests all members.
+            limit (int, optional): Maximum count of members for query, 0 means no limit (default is 0).
+            presences (bool, optional): Request presences of members, needs GUILD_PRESENCES intent (default is False).
+            timeout (float, optional): Seconds to wait for all chunks after the request is sent, None waits forever (default is 60.0).
+
+        Returns:
+            ChunkResult: Members, presences and not found user IDs.
+
+        Raises:
+            asyncio.TimeoutError: Chunks are not received in time.
+            ConnectionResetError: Connection is closed before all chunks are received.
+        """
+
+        nonce = str(next(self._chunk_nonce))
+        request = ChunkRequest(guild_id, self._event_loop.create_future())
+        self._chunk_requests[nonce] = request
 
-    async def __handle_session_id(self, packet):
-        self._session_id = packet.get("session_id")
+        payload = {
+            "guild_id": str(guild_id),
+            "limit": limit,
+            "presences": presences,
+            "nonce": nonce
+        }
+
+        if user_ids is not None:
+            payload["user_ids"] = [str(i) for i in user_ids]
+        else:
+            payload["query"] = query or ""
+
+        try:
+            await self.send({"op": self.REQUEST_MEMBERS, "d": payload})
+            request.sent = True
+
+            return await asyncio.wait_for(asyncio.shield(request.future), timeout)
+        finally:
+            self._chunk_requests.pop(nonce, None)
 
     async def __receiver(self):
         """Receive messages from WebSocket."""
@@ -93,6 +542,12 @@ class Gateway:
 
         data = packet.data
 
+        # Connection closed by the heartbeat (zombie connection)
+        if self._reconnect and packet.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED):
+            await self._session.close()
+            self._session = None
+            return 1
+
         if isinstance(packet.data, int) and len(str(packet.data)) == 4:
             # Reconnect Websocket
             if packet.data == 1001:
@@ -107,15 +562,35 @@ class Gateway:
             if packet.type == 0x101:
                 return 0
 
-        if len(data) < 4 or data[-4:] != b'\x00\x00\xff\xff':
+        # Compressor Decode
+        message = self._inflater.feed(data)
+
+        if message is None:
             return
 
-        # Compressor Decode
-        self._buffer.extend(data)
-        message = self._zlib.decompress(self._buffer).decode("utf-8")
-        message = loads(message)
+        if self.encoding == "etf":
+            message = etf.loads(message)
+        else:
+            # Skip decoding the events nobody listens to.
+            event_type, seq = peek_dispatch(message)
+
+            if event_type is not None:
+                if isinstance(event_type, bytes):
+                    event_type = event_type.decode("utf-8")
+
+                event_type = event_type.lower()
 
-        self._buffer = bytearray()
+                if event_type not in self.RECEIVER_EVENTS and not self.__listening(event_type):
+                    if seq is not None:
+                        self._seq = seq
+
+                    return
+
+            # Decoding to str first is faster than json's own bytes detection.
+            if isinstance(message, bytes):
+                message = message.decode("utf-8")
+
+            message = loads(message)
 
         opcode, data, seq, event_type = message.get(
             "op"), message.get("d"), message.get("s"), message.get("t")
@@ -127,107 +602,172 @@ class Gateway:
         # print(message, end="\n\n")
 
         if opcode == self.HELLO:
-            interval = data["heartbeat_interval"]
-            await self.__identify(interval)
+            self.__start_heartbeat(data["heartbeat_interval"] / 1000)
+
+            # Only one of them, Discord closes the connection when a resumed session is identified again.
+            if self._session_id is not None:
+                await self.__resume()
+            else:
+                await self.__identify()
+
+        elif opcode == self.HEARTBEAT_ACK:
+            self._ack_received = True
+
+            if self._last_heartbeat is not None:
+                self._latencies.append(perf_counter() - self._last_heartbeat)
+
+        # Heartbeat requested by Discord
+        elif opcode == self.HEARTBEAT:
+            await self.__send_heartbeat()
 
         elif opcode == self.DISPATCH:
             event_type = event_type.lower()
-            if event_type in (i[0] for i in self.client.events):
-                # self._event_loop.create_task(
-                #    self.__handle_event(data, event_type))
-                try:
-                    await self.__handle_event(data, event_type)
-                except Exception as error:
-                    error = getattr(error, 'original', error)
-                    print("Unexcepted error while handling the event: ",
-                          file=sys.stderr)
-                    traceback.print_exception(
-                        type(error),
-                        error,
-                        error.__traceback__,
-                        file=sys.stderr)
+
+            # Tracked here to record expected guilds before any GUILD_CREATE is handled.
+            if event_type == "ready":
+                self._session_id = data.get("session_id")
+                self.ready_tracker.start(data)
+                self._send_queue.open()
+            elif event_type == "resumed":
+                self._send_queue.open()
+            elif event_type == "guild_members_chunk":
+                self.__handle_member_chunk(data)
+
+            if self.__listening(event_type):
+                # Waiters are fed before queueing, a handler that waits for an event of its own guild holds the lane of that event.
+                self.__feed_waiters(data, event_type)
+
+                if event_type in self.client.events:
+                    await self.dispatcher.put(data, event_type)
+
+        # Session can't be resumed, data is True when it can be resumed again later.
+        elif opcode == self.INVALID_SESSION:
+            if not data:
+                self._session_id, self._seq = None, None
+
+            # Discord asks for a random wait between 1 and 5 seconds.
+            await asyncio.sleep(1 + random() * 4)
+
+            if self._session_id is not None:
+                await self.__resume()
+            else:
+                await self.__identify()
 
         # Reconnect
         elif opcode == self.RECONNECT:
             return 1
 
+    def __listening(self, event_type: str) -> bool:
+        """Whether the event has handlers and is not ignored."""
+
+        return ((event_type in self.client.events or event_type in self.client.waiters)
+                and event_type not in self.client.ignored_events)
+
+    def __build_args(self, event_data, event_type: str, handlers) -> tuple:
+        """Patch the cached object or decode the event, returns the previous state and the handler arguments."""
+
+        patched = None
+
+        # Cached objects are patched in place instead of building a new one.
+        if event_type in self._patchers:
+            snapshot = any(fn in self.client._before_listeners for fn in handlers)
+            patched = self._patchers[event_type](self.client, event_data, snapshot)
+
+        if patched is not None:
+            return patched
+
+        return None, self._decoders.get(event_type, _decode_raw)(self.client, event_data)
+
     async def __handle_event(self, event_data, event_type):
-        if event_type in ("message_create", "message_update"):
-            if event_type == "message_update" and len(event_data) == 4:
-                return
+        handlers = self.client.get_listeners(event_type, event_data)
+        raw = self.client._raw_listeners
+        args, before = None, None
 
-            filtered = self.__filter_events(
-                event_type, (Message(self.client, event_data),))
-        elif event_type in ("guild_create", "guild_update"):
-            filtered = self.__filter_events(
-                event_type, (Guild(self.client, event_data),))
-        elif event_type in ("channel_create", "channel_update", "channel_delete", "thread_create", "thread_update"):
-            filtered = self.__filter_events(
-                event_type, (Channel(self.client, event_data),))
-        elif event_type == "interaction_create":
-            filtered = self.__filter_events(
-                event_type, (Interaction(self.client, event_data),))
-        elif event_type in ("application_command_create", "application_command_update", "application_command_delete"):
-            filtered = self.__filter_events(
-                event_type, (ApplicationCommand(self.client, event_data),))
-        elif event_type in ("guild_ban_add", "guild_ban_remove"):
-            guild_id = int(event_data.get("guild_id")) if event_data.get("guild_id") else None
-            usr_obj = User(self.client, event_data.get("user")) if event_data.get("user") else None
-            filtered = self.__filter_events(event_type, (guild_id, usr_obj, ))
-        elif event_type in ("guild_emojis_update", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            emojis_obj = [Emoji(self.client, i) for i in event_data["emojis"]] if event_data.get("emojis") else None
-            filtered = self.__filter_events(event_type, (guild_id, emojis_obj, ))
-        elif event_type in ("guild_stickers_update", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            stickers_obj = [Sticker(self.client, i) for i in event_data["stickers"]] if event_data.get("stickers") else None
-            filtered = self.__filter_events(event_type, (guild_id, stickers_obj, ))
-        elif event_type in ("guild_integration_update", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            filtered = self.__filter_events(event_type, (guild_id, ))
-        elif event_type in ("guild_member_add", "guild_member_update", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-
-            del event_data["guild_id"]
-            member_obj = Member(self.client, event_data)
-
-            filtered = self.__filter_events(event_type, (guild_id, member_obj, ))
-        elif event_type in ("guild_member_remove", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            usr_obj = User(self.client, event_data["user"]) if event_data.get("user") else None
-
-            filtered = self.__filter_events(event_type, (guild_id, usr_obj, ))
-        elif event_type in ("guild_role_create", "guild_role_update", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            role_obj = Role(event_data["role"]) if event_data.get("role") else None
-            filtered = self.__filter_events(event_type, (guild_id, role_obj, ))
-        elif event_type in ("guild_role_delete", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            role_id = int(event_data["role_id"]) if event_data.get("role_id") else None
-            filtered = self.__filter_events(event_type, (guild_id, role_id, ))
-        elif event_type in ("integration_create", "integration_update", ):
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-
-            del event_data["guild_id"]
-            integration_obj = Integration(self.client, event_data)
-            filtered = self.__filter_events(event_type, (guild_id, integration_obj, ))
-        elif event_type in ("integration_delete", ):
-            integration_id = int(event_data["id"]) if event_data.get("id") else None
-            guild_id = int(event_data["guild_id"]) if event_data.get("guild_id") else None
-            application_id = int(event_data["application_id"]) if event_data.get("application_id") else None
-
-            filtered = self.__filter_events(event_type, (integration_id, guild_id, application_id, ))
-        else:
-            filtered = self.__filter_events(event_type, (event_data,))
+        # Waiters of the event already built the arguments in the receiver.
+        built = self._built_args.pop(id(event_data), None)
+
+        if built is not None and built[0] is event_data:
+            _, before, args = built
+
+        # Models are built only when a handler needs them.
+        elif any(fn not in raw for fn in handlers):
+            before, args = self.__build_args(event_data, event_type, handlers)
+
+        filtered = self.__filter_events(handlers, args, event_data, before)
+
+        await asyncio.gather(*(self.dispatcher.run(i) for i in filtered))
+
+        # Guild is counted after the cache has it.
+        if event_type == "guild_create" or (event_type == "guild_delete" and event_data.get("unavailable")):
+            self.ready_tracker.arrived(int(event_data["id"]))
+
+        elif event_type == "guilds_ready":
+            await self.ready_tracker.flush(self.dispatcher.run)
+
+    def __feed_waiters(self, event_data, event_type: str):
+        """Run the checks of the matching waiters, called from the receiver.
+
+        Waiters get the same arguments as the handlers. Updates are applied to the cached object here,
+        and the arguments are kept for the handlers, so the object is patched only once.
+        """
+
+        waiters = self.client.waiters.find(event_type, event_data)
 
-        await asyncio.gather(*filtered)
+        if not waiters:
+            return
+
+        handlers = self.client.get_listeners(event_type, event_data) if event_type in self.client.events else ()
+        before, args = None, None
+
+        try:
+            before, args = self.__build_args(event_data, event_type, handlers)
+
+            # Decoder skipped the event (embed-only message update etc.)
+            if args is not None:
+                for waiter in waiters:
+                    waiter.feed(args)
+        except Exception as error:
+            self.dispatcher.metrics["failed"] += 1
+            self.dispatcher.print_error(error)
+        finally:
+            # Handlers skip the event too if it couldn't be decoded, raw handlers still get the data.
+            if handlers:
+                self._built_args[id(event_data)] = (event_data, before, args)
+
+    def __filter_events(self, handlers, args, event_data, before=None):
+        buffering = self.ready_tracker.buffering
+        waiting = self.client._ready_listeners
+        raw = self.client._raw_listeners
+        filtered = []
+
+        for fn in handlers:
+            fn_args = (event_data, ) if fn in raw else args
+
+            # Decoder skipped the event (embed-only message update etc.)
+            if fn_args is None:
+                continue
+
+            # Previous state is given just before the updated object.
+            if fn in self.client._before_listeners and fn not in raw:
+                fn_args = (*fn_args[:-1], before, fn_args[-1])
+
+            if buffering and fn in waiting:
+                self.ready_tracker.buffer(fn, fn_args)
+            else:
+                filtered.append(fn(*fn_args))
+
+        return filtered
 
-    def __filter_events(self, event_type, args):
-        return [
-            i[1](*args) for i in self.client.events if i[0] == event_type
-        ]
+    def __handle_guilds_ready(self, packet: dict):
+        # Called from the receiver or a worker, so putting into the dispatcher can not wait here.
+        self._event_loop.create_task(self.dispatcher.put(packet, "guilds_ready"))
 
-    async def __identify(self, interval):
+    async def wait_until_ready(self):
+        """Wait until all guilds of the session have arrived (or the guild ready timeout passed)."""
+
+        await self.ready_tracker.wait()
+
+    async def __identify(self):
         """Identify the Bot."""
 
         payload = {
@@ -241,32 +781,125 @@ class Gateway:
                     "$referrer": "",
                     "$referring_domain": ""
                 },
-                "compress": True,
-                "large_threshold": 250
+                "compress": False,
+                "large_threshold": self.client.large_threshold
             }
         }
 
-        if self.client.intents != 0:
-            payload["d"]["intents"] = self.client.intents
+        intents = self.client.intents
 
-        await self.websocket.send_json(payload)
-        asyncio.run_coroutine_threadsafe(
-            self.__send_heartbeat(interval), self._event_loop)
+        if intents == "auto":
+            intents = self.client.required_intents()
 
-    async def __send_heartbeat(self, interval):
-        """Send hearbeat to the WebSocket."""
+        if intents != 0:
+            payload["d"]["intents"] = intents
+
+        if self.client.presence is not None:
+            payload["d"]["presence"] = self.client.presence
+
+        if self.client.shard is not None:
+            payload["d"]["shard"] = list(self.client.shard)
+
+        await self.__send_now(payload)
+
+    def __start_heartbeat(self, interval: float):
+        """Start the heartbeat task for the current connection."""
+
+        self.__stop_heartbeat()
+
+        self._heartbeat_interval = interval
+        self._ack_received = True
+
+        # Keep enough commands free for the heartbeats of a window and identify.
+        self._send_queue.reserved = ceil(self.limiter.per / interval) + 1
+        self._heartbeat_task = self._event_loop.create_task(
+            self.__heartbeat_loop(interval))
+
+    def __stop_heartbeat(self):
+        """Cancel the heartbeat task of the previous connection."""
+
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def __heartbeat_loop(self, interval: float):
+        """Send heartbeats every `interval` seconds, reconnect if an ACK is missed."""
+
+        # First heartbeat is delayed with jitter, as Discord requests.
+        await asyncio.sleep(interval * random())
 
         while True:
-            await asyncio.sleep(interval // 1000)
-            if self.websocket is not None:
-                await self.websocket.send_json({
-                    "op": self.HEARTBEAT,
-                    "d": self._seq
-                })
+            # Receiver waits for the dispatcher, ACK can not be read yet.
+            if not self._ack_received and not self.dispatcher.blocked:
+                await self.__close_zombie()
+                return
+
+            await self.__send_heartbeat()
+            await asyncio.sleep(interval)
+
+    async def __send_heartbeat(self):
+        """Send hearbeat to the WebSocket."""
+
+        if self.websocket is None or self.websocket.closed:
+            return
+
+        self._ack_received = False
+        self._last_heartbeat = perf_counter()
+
+        await self.__send_now({
+            "op": self.HEARTBEAT,
+            "d": self._seq
+        })
+
+    async def __close_zombie(self):
+        """Close the connection that stopped answering heartbeats, receiver will reconnect."""
+
+        print("Heartbeat ACK is not received, reconnecting...", file=sys.stderr)
+
+        self._reconnect = True
+        self._heartbeat_task = None
+
+        if self.websocket is not None and not self.websocket.closed:
+            await self.websocket.close(code=4000)
+
+    async def send(self, payload: dict, key: str = None):
+        """Send a command to the gateway through the rate-limited send queue.
+
+        Discord allows 120 commands per 60 seconds, some of them are reserved for heartbeats.
+        Waits until the command is sent.
+
+        Args:
+            payload (dict): Gateway payload with `op` and `d` keys.
+            key (str, optional): Coalescing key, a queued command with same key is replaced and only the latest one is sent.
+        """
+
+        await self._send_queue.put(payload, key)
+
+    async def __send_now(self, payload: dict):
+        """Send a priority command (heartbeat, identify, resume) without queueing."""
+
+        delay = self.limiter.delay()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        self.limiter.hit()
+        await self.__write(payload)
+
+    async def __write(self, payload: dict):
+        """Encode a payload with the client encoding and write it to the websocket."""
+
+        if self.encoding == "etf":
+            await self.websocket.send_bytes(etf.dumps(payload))
+        else:
+            await self.websocket.send_str(dumps(payload))
 
     async def start_connection(self):
         """Start the Gateway Connection."""
 
+        self.dispatcher.start()
+        self._send_queue.start()
+
         await self.__connect()
         result = await self.__receiver()
 
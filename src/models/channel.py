@@ -72,7 +72,7 @@ class Channel:
         self.user_limit: Union[int, None] = data.get("user_limit")
         self.rate_limit_per_user: Union[int,
                                         None] = data.get("rate_limit_per_user")
-        self.recipients: Union[list, None] = [User(self.client, i) for i in data.get(
+        self.recipients: Union[list, None] = [self.client.users.intern(i) for i in data.get(
             "recipients")] if data.get("recipients") is not None else None
         self.icon: Union[str, None] = data.get("icon")
         self.owner_id: Union[int, None] = int(
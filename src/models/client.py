@@ -2,49 +2,122 @@
 Client model for krema.
 """
 
+import asyncio
 from dataclasses import dataclass
 from typing import Union
 
-from unikorn import kollektor
+from .. import cachefile
+from ..backends import CacheBackend, MemoryBackend
+from ..cache import FILTERED_CACHE_TYPES, CachePolicy, GuildStore, ChannelStore, MessageStore, UserStore, event_cache_type
+from ..dispatcher import scope_ids
 from ..utils import dict_to_query, image_to_data_uri
+from ..waiters import Waiter, Waiters
 
 
 class Client:
     """Base class for client.
 
     Args:
-        intents (int): Intents for your bot. Do not add any intent if you are using for self-bot.
-        message_limit (int): Message cache limit for krema (default is 200). 
+        intents (int, str): Intents for your bot, "auto" calculates minimal intents from the registered events when connecting. Do not add any intent if you are using for self-bot.
+        message_limit (int): Message cache limit for krema, for all channels (default is 200). 
+        channel_message_limit (int): Message cache limit for each channel, so a busy channel can not evict the others (default is 50).
         channel_limit (int): Channel cache limit for krema (default is None). 
         guild_limit (int): Guild cache limit for krema (default is None). 
+        dispatch_workers (int): Count of workers that run event handlers concurrently (default is 8).
+        dispatch_queue_size (int): Maximum count of events waiting for a worker. With ordered dispatch every worker's lane holds `dispatch_queue_size // dispatch_workers` events, receiving from gateway waits when the lane of an event is full (default is 1000).
+        handler_timeout (float): Timeout for each event handler in seconds (default is None).
+        ordered_dispatch (bool): Handle events of the same guild (or DM channel) in order, different guilds are still handled in parallel (default is True).
+        encoding (str): Gateway payload encoding, "json" or "etf". ETF is smaller on the wire and sends snowflakes as integers (default is "json").
+        compress (str): Gateway transport compression, "zlib-stream", "zstd-stream" (needs `zstandard` module) or None for no compression (default is "zlib-stream").
+        large_threshold (int): Member count (50-250) after which offline members are not sent in GUILD_CREATE (default is 250).
+        presence (dict): Initial presence for identify, https://discord.com/developers/docs/topics/gateway#update-presence-gateway-presence-update-structure (default is None).
+        shard (list): Shard ID and shard count like `[0, 2]` (default is None).
+        ignored_events (list): Events that are dropped without decoding even if they have handlers, and not counted for "auto" intents (default is None).
+        guild_ready_timeout (float): Seconds to wait for the next GUILD_CREATE after READY before `guilds_ready` is fired without the missing guilds (default is 2.0).
+        cache_policies (dict): `CachePolicy` for "guilds", "channels", "messages", "members", "users" or "presences", overrides the limits above. Handlers of a disabled type are not registered. "members", "users" and "presences" only support `enabled` and `predicate`. Presences are disabled by default, the presences of GUILD_CREATE are still kept in `Guild.presences` (default is None).
+        cache_backend (CacheBackend): Where guilds, channels, messages and members are kept, like `krema.backends.SQLiteBackend` for the sets that don't fit in memory (default is `MemoryBackend`).
 
     Attributes:
         token (str): Bot token for http request.
-        events (list): List of events for client.
+        events (dict): Event handlers for client, event name is mapped to the list of handlers.
+        waiters (Waiters): Pending `wait_for` and `collect` calls.
         user (User): Client user.
-        messages (kollektor.Kollektor): Message cache.
-        guilds (kollektor.Kollektor): Guild cache.
-        channels (kollektor.Kollektor): Channel cache.
+        messages (MessageStore): Message cache, use `messages.channel(id)` for the messages of a channel.
+        guilds (GuildStore): Guild cache, also indexes roles and emojis by guild.
+        channels (ChannelStore): Channel cache, also indexes channels by guild, children by category and threads by parent.
+        users (UserStore): Shared User objects of all models, by ID.
+        cache_policies (dict): Cache type mapped to its `CachePolicy`.
+        cache_backend (CacheBackend): Cache backend of the stores.
         connection (Gateway): Client gateway.
         connection (HTTP): Client http class.
     """
 
-    def __init__(self, intents: int = 0, message_limit: int = 200, channel_limit: int = None,
-                 guild_limit: int = None) -> None:
+    def __init__(self, intents: Union[int, str] = 0, message_limit: int = 200, channel_limit: int = None,
+                 guild_limit: int = None, dispatch_workers: int = 8, dispatch_queue_size: int = 1000,
+                 handler_timeout: float = None, ordered_dispatch: bool = True, encoding: str = "json",
+                 compress: str = "zlib-stream", large_threshold: int = 250, presence: dict = None,
+                 shard: list = None, ignored_events: list = None, guild_ready_timeout: float = 2.0,
+                 channel_message_limit: int = 50, cache_policies: dict = None,
+                 cache_backend: CacheBackend = None) -> None:
         from .user import User
 
-        self.intents: int = intents
+        self.intents: Union[int, str] = intents
+
+        self.dispatch_workers: int = dispatch_workers
+        self.dispatch_queue_size: int = dispatch_queue_size
+        self.handler_timeout: Union[float, None] = handler_timeout
+        self.ordered_dispatch: bool = ordered_dispatch
+        self.encoding: str = encoding
+        self.compress: Union[str, None] = compress
+
+        self.large_threshold: int = large_threshold
+        self.presence: Union[dict, None] = presence
+        self.shard: Union[list, None] = shard
+        self.ignored_events: set = set(ignored_events or ())
+        self.guild_ready_timeout: float = guild_ready_timeout
 
         self.token: str = ""
-        self.events: list = []
+        self.events: dict = {}
+        self._internal_listeners: set = set()
+        self._ready_listeners: set = set()
+        self._raw_listeners: set = set()
+        self._before_listeners: set = set()
+
+        # Event name -> handlers without scope, and event name -> (guild ID -> handlers, channel ID -> handlers).
+        self._unscoped_events: dict = {}
+        self._scopes: dict = {}
+
+        self.waiters: Waiters = Waiters()
         self.user: Union[User, None] = None
 
-        self.messages: kollektor.Kollektor = kollektor.Kollektor(
-            limit=message_limit, items=())
-        self.guilds: kollektor.Kollektor = kollektor.Kollektor(
-            limit=guild_limit, items=())
-        self.channels: kollektor.Kollektor = kollektor.Kollektor(
-            limit=channel_limit, items=())
+        self.cache_policies: dict = {
+            "guilds": CachePolicy(max_entries=guild_limit, strategy="fifo"),
+            "channels": CachePolicy(max_entries=channel_limit, strategy="fifo"),
+            "messages": CachePolicy(max_entries=message_limit, strategy="fifo"),
+            "members": CachePolicy(),
+            "users": CachePolicy(),
+            "presences": CachePolicy(enabled=False)
+        }
+
+        for key, policy in (cache_policies or {}).items():
+            if key not in self.cache_policies:
+                raise ValueError(f"Unknown cache type: {key}")
+            elif key in FILTERED_CACHE_TYPES and policy.limited:
+                raise ValueError(f"Cache type {key} only supports enabled and predicate")
+
+            self.cache_policies[key] = policy
+
+        self.cache_backend: CacheBackend = cache_backend or MemoryBackend()
+        self.cache_backend.bind(self)
+
+        self.messages: MessageStore = MessageStore(
+            channel_limit=channel_message_limit, policy=self.cache_policies["messages"], backend=self.cache_backend)
+        self.guilds: GuildStore = GuildStore(policy=self.cache_policies["guilds"],
+                                             member_policy=self.cache_policies["members"],
+                                             presence_policy=self.cache_policies["presences"],
+                                             backend=self.cache_backend)
+        self.channels: ChannelStore = ChannelStore(policy=self.cache_policies["channels"], backend=self.cache_backend)
+        self.users: UserStore = UserStore(self, policy=self.cache_policies["users"])
 
         self.connection = None
         self.http = None
@@ -65,18 +138,47 @@ class Client:
         else:
             return self.token
 
-    def event(self, event_name: str = None):
+    @property
+    def latency(self) -> float:
+        """Returns gateway heartbeat latency.
+
+        Returns:
+            float: Latency in seconds, `float("inf")` if client is not connected.
+        """
+
+        if self.connection is None:
+            return float("inf")
+
+        return self.connection.latency
+
+    def event(self, event_name: str = None, wait_ready: bool = False, raw: bool = False,
+              guilds: list = None, channels: list = None, before: bool = False):
         """Event decorator for handle gateway events.
 
         Args:
             event_name (str, optional): Event name in lowercase. Example MESSAGE_CREATE is message_create for krema. If you don't add this argument, It will get the name from function name.
+            wait_ready (bool, optional): Buffer the events until all guilds are received after READY (`guilds_ready` event), then handle them in order (default is False).
+            raw (bool, optional): Handler receives the event data as decoded dict, no model is built for it (default is False).
+            guilds (list, optional): Handle only the events of these guild IDs (default is None).
+            channels (list, optional): Handle only the events of these channel IDs (default is None).
+            before (bool, optional): Handler also receives the cached state before the update, just before the updated object (`before, after`), None if it was not cached (default is False).
+
+        Examples:
+            >>> @client.event("message_create", raw=True)
+            ... async def forward(data):
+            ...     print(data["channel_id"], data["content"])
+
+            >>> @client.event("message_create", channels=[860139467212292106])
+            ... async def support(message): ...
+
+            >>> @client.event("message_update", before=True)
+            ... async def edited(before, after): ...
         """
 
         def decorator(fn):
             def wrapper():
-                self.events.append(
-                    (event_name or fn.__name__, fn)
-                )
+                self.add_listener(event_name or fn.__name__, fn, wait_ready=wait_ready, raw=raw,
+                                  guilds=guilds, channels=channels, before=before)
 
                 return self.events
 
@@ -84,6 +186,186 @@ class Client:
 
         return decorator
 
+    def add_listener(self, event_name: str, fn, internal: bool = False, wait_ready: bool = False, raw: bool = False,
+                     guilds: list = None, channels: list = None, before: bool = False):
+        """Add a handler for gateway event.
+
+        Args:
+            event_name (str): Event name in lowercase.
+            fn (Callable): Coroutine function that handles the event.
+            internal (bool, optional): Handler is used by krema itself (cache etc.), it is not counted for required intents (default is False).
+            wait_ready (bool, optional): Buffer the events until all guilds are received after READY (default is False).
+            raw (bool, optional): Handler receives the event data as decoded dict. Models are not built when all handlers of the event are raw (default is False).
+            guilds (list, optional): Handle only the events of these guild IDs (default is None).
+            channels (list, optional): Handle only the events of these channel IDs, an event matching any of `guilds` or `channels` is handled (default is None).
+            before (bool, optional): Handler also receives the cached state before the update (default is False).
+        """
+
+        if event_name in self.events:
+            self.events[event_name].append(fn)
+        else:
+            self.events[event_name] = [fn]
+
+        if internal:
+            self._internal_listeners.add(fn)
+
+        if wait_ready:
+            self._ready_listeners.add(fn)
+
+        if raw:
+            self._raw_listeners.add(fn)
+
+        if before:
+            self._before_listeners.add(fn)
+
+        if guilds is None and channels is None:
+            self._unscoped_events.setdefault(event_name, []).append(fn)
+        else:
+            index = self._scopes.setdefault(event_name, ({}, {}))
+
+            for scope, ids in zip(index, (guilds or (), channels or ())):
+                for i in ids:
+                    scope.setdefault(int(i), []).append(fn)
+
+    def get_listeners(self, event_name: str, event_data) -> list:
+        """Get the handlers of an event, scoped handlers are found by the IDs in the raw payload.
+
+        Args:
+            event_name (str): Event name in lowercase.
+            event_data: Event data from gateway.
+
+        Returns:
+            list: Handlers for this event.
+        """
+
+        handlers = self._unscoped_events.get(event_name, [])
+        index = self._scopes.get(event_name)
+
+        if index is None:
+            return handlers
+
+        scoped = []
+
+        for scope, scope_id in zip(index, scope_ids(event_data, event_name)):
+            if scope_id is not None:
+                scoped.extend(scope.get(scope_id, ()))
+
+        if len(scoped) == 0:
+            return handlers
+
+        # A handler can match both its guild and channel.
+        return handlers + list(dict.fromkeys(scoped))
+
+    def required_intents(self, direct_messages: bool = True) -> int:
+        """Calculate minimal intents for the registered event handlers.
+
+        Handlers of krema itself and ignored events are not counted.
+
+        Args:
+            direct_messages (bool, optional): Add intents for DM events too (default is True).
+
+        Returns:
+            int: Intents value.
+
+        Examples:
+            >>> @client.event()
+            ... async def message_create(message): ...
+            >>> client.required_intents()
+            4609
+        """
+
+        from ..types import Intents
+
+        events = [
+            name for name, handlers in self.events.items()
+            if name not in self.ignored_events and any(i not in self._internal_listeners for i in handlers)
+        ]
+
+        return Intents().FromEvents(events, direct_messages)
+
+    async def wait_for(self, event_name: str, check=None, timeout: float = None, channel_id: int = None,
+                       message_id: int = None, custom_id: str = None):
+        """Wait for the next event that matches the keys and the check.
+
+        Keys are matched with hash lookups before the check runs, so waiters with keys are cheap even when there are many of them.
+        Waiters are fed when the event is received, before it is queued for the handlers, so a handler can wait for the next event of its own guild.
+        The check runs in the receiver and must not block. It gets the same objects as the handlers, updates of cached objects are applied before it runs.
+
+        Args:
+            event_name (str): Event name in lowercase.
+            check (Callable, optional): Function that gets the handler arguments and returns True for the wanted event.
+            timeout (float, optional): Seconds to wait (default is None).
+            channel_id (int, optional): Channel ID of the event.
+            message_id (int, optional): Message ID of the event (message, reaction and component interaction events).
+            custom_id (str, optional): Custom ID of the component interaction.
+
+        Returns:
+            Any: Handler argument of the event, tuple if the event has more than one argument.
+
+        Raises:
+            asyncio.TimeoutError: No event is received in time.
+
+        Examples:
+            >>> message = await client.wait_for("message_create", channel_id=message.channel_id,
+            ...                                 check=lambda m: m.author.id == message.author.id, timeout=30)
+        """
+
+        results = await self.__wait(event_name, check, timeout, 1, channel_id, message_id, custom_id)
+        return results[0]
+
+    async def collect(self, event_name: str, check=None, timeout: float = None, limit: int = None,
+                      channel_id: int = None, message_id: int = None, custom_id: str = None) -> list:
+        """Collect the events that match the keys and the check until the timeout passes or `limit` events are collected.
+
+        Args:
+            event_name (str): Event name in lowercase.
+            check (Callable, optional): Function that gets the handler arguments and returns True for the wanted event.
+            timeout (float, optional): Seconds to collect, one of `timeout` and `limit` should be given (default is None).
+            limit (int, optional): Count of events to collect (default is None).
+            channel_id (int, optional): Channel ID of the event.
+            message_id (int, optional): Message ID of the event (message, reaction and component interaction events).
+            custom_id (str, optional): Custom ID of the component interaction.
+
+        Returns:
+            list: Collected events, same values with `wait_for`.
+
+        Examples:
+            >>> clicks = await client.collect("interaction_create", message_id=message.id, timeout=60)
+        """
+
+        return await self.__wait(event_name, check, timeout, limit, channel_id, message_id, custom_id, partial=True)
+
+    async def __wait(self, event_name: str, check, timeout: Union[float, None], limit: Union[int, None],
+                     channel_id: int, message_id: int, custom_id: str, partial: bool = False) -> list:
+        keys = {
+            i: value for i, value in (("custom_id", custom_id), ("message_id", message_id), ("channel_id", channel_id))
+            if value is not None
+        }
+
+        waiter = Waiter(event_name, check, keys, limit)
+        self.waiters.add(waiter)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if partial:
+                return waiter.results
+
+            raise
+        finally:
+            self.waiters.remove(waiter)
+
+    async def wait_until_ready(self):
+        """Wait until all guilds are received after READY, or `guild_ready_timeout` passed for the missing ones.
+
+        Examples:
+            >>> await client.wait_until_ready()
+            >>> len(client.guilds.items)
+            12
+        """
+
+        await self.connection.wait_until_ready()
+
     async def check_token(self):
         """Check token status for client.
 
@@ -91,9 +373,8 @@ class Client:
             None: Client token works.
         """
 
-        from .user import User
         result = await self.http.request("GET", "/users/@me")
-        self.user = User(self, result)
+        self.user = self.users.intern(result)
 
     def start(self, token: str, bot: bool = True):
         """Start the client.
@@ -119,14 +400,12 @@ class Client:
     def __add_cache_events(self):
         # Message Add Handler
         async def _message_create(message_packet):
-            self.messages.append(message_packet)
+            self.messages.upsert(message_packet)
 
         # Message Update Handler
         async def _message_update(message_packet):
-            for index, message in enumerate(self.messages.items):
-                if message.id == message_packet.id:
-                    self.messages.update(index, message_packet)
-                    break
+            if message_packet.id in self.messages:
+                self.messages.upsert(message_packet)
 
         # Message Delete Handler
         async def _message_delete(packet):
@@ -135,9 +414,7 @@ class Client:
             if message_id is None:
                 return
             else:
-                message_id = int(message_id)
-                self.messages.items = tuple(
-                    i for i in self.messages.items if i.id != message_id)
+                self.messages.delete(int(message_id))
 
         # Message Bulk Delete Handler
         async def _message_delete_bulk(packet):
@@ -146,24 +423,53 @@ class Client:
             if message_ids is None:
                 return
             else:
-                message_ids = tuple(int(i) for i in message_ids)
-                self.messages.items = tuple(
-                    i for i in self.messages.items if i.id not in message_ids)
+                for i in message_ids:
+                    self.messages.delete(int(i))
+
+        # Ready Handler, guilds that are loaded from a cache file but removed while offline are not in READY.
+        async def _ready(packet):
+            guild_ids = {int(i["id"]) for i in packet.get("guilds", ())}
+
+            for guild in self.guilds.items:
+                if guild.id not in guild_ids:
+                    self.guilds.delete(guild.id)
+                    self.channels.delete_guild(guild.id)
 
         # Guild Create Handler
         async def _guild_create(guild):
-            self.guilds.append(guild)
+            self.guilds.upsert(guild)
 
-            # Add Guild Channels
+            # Remove the channels that are deleted while offline, GUILD_CREATE has all of them.
             if guild.channels is not None:
-                self.channels.append(*guild.channels)
+                channel_ids = {i.id for i in guild.channels + (guild.threads or [])}
+
+                for channel in self.channels.guild(guild.id, threads=True):
+                    if channel.id not in channel_ids:
+                        self.channels.delete(channel.id)
+
+            # Add Guild Channels and Threads, channels in GUILD_CREATE don't have guild_id.
+            for channel in (guild.channels or []) + (guild.threads or []):
+                channel.guild_id = guild.id
+                self.channels.upsert(channel)
 
         # Guild Update Handler
         async def _guild_update(guild_packet):
-            for index, guild in enumerate(self.guilds.items):
-                if guild.id == guild_packet.id:
-                    self.guilds.update(index, guild_packet)
-                    break
+            old = self.guilds.get(guild_packet.id)
+
+            if old is None:
+                return
+
+            # GUILD_UPDATE doesn't have the state that is only sent in GUILD_CREATE.
+            for i in ("_members", "channels", "threads", "stickers", "member_count", "joined_at", "large",
+                      "voice_states", "stage_instances"):
+                if getattr(guild_packet, i) is None:
+                    setattr(guild_packet, i, getattr(old, i))
+
+            # Indexed presences are kept by the store, otherwise the ones from GUILD_CREATE are kept.
+            if not self.guilds.presence_policy.enabled and guild_packet.presences is None:
+                guild_packet.presences = old.presences
+
+            self.guilds.upsert(guild_packet)
 
         # Guild Delete Handler
         async def _guild_delete(packet):
@@ -172,41 +478,68 @@ class Client:
             if guild_id is None:
                 return
             else:
-                guild_id = int(guild_id)
-                self.guilds.items = tuple(
-                    i for i in self.guilds.items if i.id != guild_id)
+                self.guilds.delete(int(guild_id))
+                self.channels.delete_guild(int(guild_id))
+
+        # Role Create / Update Handlers
+        async def _guild_role_create(guild_id, role):
+            self.guilds.upsert_role(guild_id, role)
+
+        async def _guild_role_update(guild_id, role):
+            self.guilds.upsert_role(guild_id, role)
+
+        # Role Delete Handler
+        async def _guild_role_delete(guild_id, role_id):
+            self.guilds.delete_role(guild_id, role_id)
+
+        # Emojis Update Handler
+        async def _guild_emojis_update(guild_id, emojis):
+            self.guilds.set_emojis(guild_id, emojis or [])
+
+        # Stickers Update Handler
+        async def _guild_stickers_update(guild_id, stickers):
+            self.guilds.set_stickers(guild_id, stickers or [])
+
+        # Member Add Handler
+        async def _guild_member_add(guild_id, member):
+            self.guilds.upsert_member(guild_id, member, joined=True)
+
+        # Member Update Handler
+        async def _guild_member_update(guild_id, member):
+            self.guilds.upsert_member(guild_id, member)
+
+        # Member Remove Handler
+        async def _guild_member_remove(guild_id, user):
+            if user is not None:
+                self.guilds.delete_member(guild_id, user.id)
+
+        # Presence Update Handler
+        async def _presence_update(packet):
+            if packet.get("guild_id") is not None:
+                self.guilds.update_presence(int(packet["guild_id"]), packet)
 
         # Channel Create Handler
         async def _channel_create(channel):
-            self.channels.append(channel)
+            self.channels.upsert(channel)
 
         # Channel Update Handler
         async def _channel_update(channel_packet):
-            for index, channel in enumerate(self.channels.items):
-                if channel.id == channel_packet.id:
-                    self.channels.update(index, channel_packet)
-                    break
+            if channel_packet.id in self.channels:
+                self.channels.upsert(channel_packet)
 
         # Channel Delete Handler
         async def _channel_delete(channel_packet):
-            channel_id = hasattr(channel_packet, "id")
-
-            if channel_id is None:
-                return
-            else:
-                self.channels.items = tuple(
-                    i for i in self.channels.items if i.id != channel_packet.id)
+            self.channels.delete(channel_packet.id)
+            self.messages.delete_channel(channel_packet.id)
 
         # Thread Create Handler
         async def _thread_create(channel):
-            self.channels.append(channel)
+            self.channels.upsert(channel)
 
         # Thread Update Handler
         async def _thread_update(channel_packet):
-            for index, channel in enumerate(self.channels.items):
-                if channel.id == channel_packet.id:
-                    self.channels.update(index, channel_packet)
-                    break
+            if channel_packet.id in self.channels:
+                self.channels.upsert(channel_packet)
 
         # Thread Delete Handler
         async def _thread_delete(channel_packet):
@@ -215,16 +548,20 @@ class Client:
             if channel_id is None:
                 return
             else:
-                channel_id = int(channel_id)
-                self.channels.items = tuple(
-                    i for i in self.channels.items if i.id != channel_id)
+                self.channels.delete(int(channel_id))
+                self.messages.delete_channel(int(channel_id))
 
         local = locals()
 
-        # Load Events
-        self.events.extend(
-            (i[1:], local[i]) for i in local if i.startswith("_")
-        )
+        # Load Events, handlers of disabled cache types are not registered so their events are not decoded.
+        for i in local:
+            if not i.startswith("_"):
+                continue
+
+            cache_type = event_cache_type(i[1:])
+
+            if cache_type is None or self.cache_policies[cache_type].enabled:
+                self.add_listener(i[1:], local[i], internal=True)
 
     # Cache Functions
     # ==================
@@ -240,12 +577,7 @@ class Client:
             None: Guild is not Found.
         """
 
-        result = self.guilds.find(lambda g: g.id == guild_id)
-
-        if result != kollektor.Nothing:
-            return result
-        else:
-            return None
+        return self.guilds.get(guild_id)
 
     def get_channel(self, channel_id: int):
         """Get Channel from Cache by ID.
@@ -258,12 +590,20 @@ class Client:
             None: Channel is not Found.
         """
 
-        result = self.channels.find(lambda c: c.id == channel_id)
+        return self.channels.get(channel_id)
 
-        if result != kollektor.Nothing:
-            return result
-        else:
-            return None
+    def get_user(self, user_id: int):
+        """Get User from Cache by ID.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            User: Found User object.
+            None: User is not Found.
+        """
+
+        return self.users.get(user_id)
 
     def get_message(self, message_id: int):
         """Get Message from Cache by ID.
@@ -276,12 +616,49 @@ class Client:
             None: Message is not Found.
         """
 
-        result = self.messages.find(lambda m: m.id == message_id)
+        return self.messages.get(message_id)
 
-        if result != kollektor.Nothing:
-            return result
-        else:
-            return None
+    def save_cache(self, path: str) -> dict:
+        """Save the guild, channel and message caches to a file, to start warm with `load_cache` after a restart.
+
+        Args:
+            path (str): File path.
+
+        Returns:
+            dict: Section name ("guilds", "channels", "messages") mapped to the count of saved objects.
+
+        Examples:
+            >>> client.save_cache("cache.bin")
+            {"guilds": 120, "channels": 3400, "messages": 200}
+        """
+
+        return cachefile.save(self, path)
+
+    def load_cache(self, path: str) -> dict:
+        """Load the caches from a file written by `save_cache`.
+
+        Call it before `start`, cached objects can be used right away. Gateway events update them after connecting:
+        READY removes the guilds that the client is no longer in and GUILD_CREATE replaces the guilds and their channels.
+
+        The file is a pickle stream, loading it can run arbitrary code. Only load files written by your own bot
+        and keep them where nobody else can replace them.
+
+        Args:
+            path (str): File path.
+
+        Returns:
+            dict: Section name mapped to the count of loaded objects.
+
+        Raises:
+            ValueError: File is not a cache file of this krema version.
+
+        Examples:
+            >>> client.load_cache("cache.bin")
+            >>> client.get_guild(guild_id)
+            Guild()
+        """
+
+        return cachefile.load(self, path)
 
     def get_thread(self, thread_id: int, list_thread_result: dict):
         """Get Thread-Channel with Thread ID.
@@ -329,14 +706,61 @@ class Client:
     async def update_presence(self, packet: dict):
         """Update client-user presence.
 
+        Presence updates are rate-limited with other gateway commands, if an update is still waiting only the latest one is sent.
+
         Args:
             packet (dict): https://discord.com/developers/docs/topics/gateway#update-presence-gateway-presence-update-structure
         """
 
-        await self.connection.websocket.send_json({
+        await self.connection.send({
             "op": 3,
             "d": packet
-        })
+        }, key="presence")
+
+    async def request_members(self, guild_id: int, user_ids: list = None, query: str = None, limit: int = 0,
+                              presences: bool = False, timeout: float = 60.0):
+        """Request guild members over gateway, much cheaper than REST for large guilds.
+
+        Members are returned in chunks by Discord, this waits for all of them and adds them (and the presences) to the cached guild.
+        Chunks are collected when they are received, so it can be awaited from any event handler.
+        Needs GUILD_MEMBERS intent for requesting all members.
+
+        Args:
+            guild_id (int): Guild ID.
+            user_ids (list, optional): List of user IDs to fetch.
+            query (str, optional): Username prefix to search, empty string (default) requests all members.
+            limit (int, optional): Maximum count of members for query, 0 means no limit (default is 0).
+            presences (bool, optional): Request presences of members, needs GUILD_PRESENCES intent (default is False).
+            timeout (float, optional): Seconds to wait for all chunks after the request is sent, None waits forever (default is 60.0).
+
+        Returns:
+            ChunkResult: Result with `members`, `presences` and `not_found` user IDs, iterating it gives the members.
+
+        Raises:
+            asyncio.TimeoutError: Chunks are not received in time.
+            ConnectionResetError: Gateway connection is closed before all chunks are received.
+
+        Examples:
+            >>> result = await client.request_members(123, user_ids=[456, 789], presences=True)
+            >>> result.members, result.not_found
+            ([Member()], [789])
+        """
+
+        return await self.connection.request_members(guild_id, user_ids=user_ids, query=query, limit=limit,
+                                                     presences=presences, timeout=timeout)
+
+    async def chunk_guilds(self, *guild_ids: int, presences: bool = False) -> list:
+        """Request all members of many guilds, requests are sent within the gateway rate limit.
+
+        Args:
+            *guild_ids (int): Guild IDs.
+            presences (bool, optional): Request presences of members (default is False).
+
+        Returns:
+            list: List of ChunkResult objects, in same order with guild IDs.
+        """
+
+        return await asyncio.gather(*(self.request_members(i, presences=presences) for i in guild_ids))
 
     # Endpoint Functions
     # ==================
@@ -366,11 +790,9 @@ class Client:
             User: Found user.
         """
 
-        from .user import User
-
         result = await self.http.request("GET", f"/users/{id if id is not None else '@me'}")
 
-        return User(self, result)
+        return self.users.intern(result)
 
     async def create_guild(self, **kwargs):
         """Create a Guild with API params.
@@ -414,13 +836,11 @@ class Client:
             User: Updated user.
         """
 
-        from .user import User
-
         result = await self.http.request("PATCH", "/users/@me", json={
             "username": username,
             "avatar": image_to_data_uri(path)
         })
-        return User(self, result)
+        return self.users.intern(result)
 
     async def edit_banner_color(self, color: int):
         """Change banned color.
@@ -432,12 +852,10 @@ class Client:
             User: Updated user.
         """
 
-        from .user import User
-
         result = await self.http.request("PATCH", "/users/@me", json={
             "accent_color": color
         })
-        return User(self, result)
+        return self.users.intern(result)
 
     async def edit_nickname(self, guild_id: int, nick: str):
         """Edit Client User nickname from Guild.
@@ -579,7 +997,7 @@ class Interaction:
             data.get("channel_id")) if data.get("channel_id") is not None else None
         self.member: Union[Member, None] = Member(self.client, data.get(
             "member")) if data.get("member") is not None else None
-        self.user: Union[User, None] = User(self.client, data.get(
+        self.user: Union[User, None] = self.client.users.intern(data.get(
             "user")) if data.get("user") is not None else None
         self.token: str = data.get("token")
         self.version: int = data.get("version")
@@ -25,6 +25,7 @@ class Guild:
     def __init__(self, client, data: dict) -> None:
         from .user import Member
         from .channel import Channel
+        from .sticker import Sticker
 
         self.client = client
 
@@ -69,6 +70,8 @@ class Guild:
         self.voice_states: Union[list, None] = data.get("voice_states")
         self.members: Union[list, None] = [Member(self.client, i) for i in data.get(
             "members")] if data.get("members") is not None else None
+        self.stickers: Union[list, None] = [Sticker(self.client, i) for i in data.get(
+            "stickers")] if data.get("stickers") is not None else None
         self.channels: Union[list, None] = [Channel(self.client, i) for i in data.get(
             "channels")] if data.get("channels") is not None else None
         self.threads: Union[list, None] = [Channel(self.client, i) for i in data.get(
@@ -95,6 +98,35 @@ class Guild:
         self.nsfw_level: int = data.get("nsfw_level")
         self.stage_instances: Union[list, None] = data.get("stage_instances")
 
+    @property
+    def members(self) -> Union[list, None]:
+        """Cached members of the guild.
+
+        Returns:
+            list: List of Member objects.
+            None: Members are not sent for this guild.
+        """
+
+        return list(self._members.values()) if self._members is not None else None
+
+    @members.setter
+    def members(self, members: Union[list, None]):
+        self._members: Union[dict, None] = {
+            i.user.id: i for i in members} if members is not None else None
+
+    def get_member(self, user_id: int):
+        """Get a cached member by user ID.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            Member: Found member object.
+            None: Member is not cached.
+        """
+
+        return self._members.get(user_id) if self._members is not None else None
+
     async def edit(self, **kwargs):
         """Modify the Guild with API params.
 
@@ -251,6 +283,18 @@ class Guild:
         result = await self.client.http.request("GET", f"/guilds/{self.id}/members{dict_to_query(kwargs)}")
         return [Member(self.client, i) for i in result]
 
+    async def chunk(self, presences: bool = False):
+        """Request all Guild Members over gateway and add them to the cache.
+
+        Args:
+            presences (bool, optional): Request presences of members (default is False).
+
+        Returns:
+            ChunkResult: Result with `members`, `presences` and `not_found`, iterating it gives the Guild Members.
+        """
+
+        return await self.client.request_members(self.id, presences=presences)
+
     async def search_member(self, **kwargs):
         """Search Guild Member with API params.
 
@@ -643,7 +687,7 @@ class Emoji:
             data.get("id")) if data.get("id") is not None else None
         self.name: Union[str, None] = data.get("name")
         self.roles: Union[list, None] = data.get("roles")
-        self.user: Union[User, None] = User(self.client, data.get(
+        self.user: Union[User, None] = self.client.users.intern(data.get(
             "user")) if data.get("user") is not None else None
         self.require_colons: Union[bool, None] = data.get("require_colons")
         self.managed: Union[bool, None] = data.get("managed")
@@ -671,7 +715,7 @@ class Ban:
         self.client = client
 
         self.reason: Union[str, None] = data.get("reason")
-        self.user: User = User(self.client, data.get("user"))
+        self.user: User = self.client.users.intern(data.get("user"))
 
 
 @dataclass
@@ -746,7 +790,7 @@ class Integration:
         self.expire_behavior: Union[int, None] = data.get("expire_behavior")
         self.expire_grace_period: Union[int,
                                         None] = data.get("expire_grace_period")
-        self.user: Union[User, None] = User(client, data.get(
+        self.user: Union[User, None] = client.users.intern(data.get(
             "user")) if data.get("user") is not None else None
         self.account: dict = data.get("account")
         self.synced_at: Union[datetime, None] = convert_iso(
@@ -783,7 +827,7 @@ class IntegrationApplication:
         self.icon: Union[str, None] = data.get("icon")
         self.description: str = data.get("description")
         self.summary: str = data.get("summary")
-        self.bot: Union[User, None] = User(client, data.get(
+        self.bot: Union[User, None] = client.users.intern(data.get(
             "bot")) if data.get("bot") is not None else None
 
 
@@ -810,7 +854,7 @@ class AuditLog:
 
         self.webhooks: list = [Webhook(client, i)
                                for i in data.get("webhooks")]
-        self.users: list = [User(client, i) for i in data.get("users")]
+        self.users: list = [client.users.intern(i) for i in data.get("users")]
         self.integrations: list = [Integration(
             client, i) for i in data.get("integrations")]
         self.threads: list = [Channel(client, i) for i in data.get("threads")]
@@ -45,10 +45,10 @@ class Invite:
             "guild")) if data.get("guild") is not None else None
         self.channel: Union[Channel, None] = Channel(client, data.get(
             "channel")) if data.get("channel") is not None else None
-        self.inviter: Union[User, None] = User(client, data.get(
+        self.inviter: Union[User, None] = client.users.intern(data.get(
             "inviter")) if data.get("inviter") is not None else None
         self.target_type: Union[int, None] = data.get("target_type")
-        self.target_user: Union[User, None] = User(client, data.get(
+        self.target_user: Union[User, None] = client.users.intern(data.get(
             "target_user")) if data.get("target_user") is not None else None
         self.target_application: Union[dict,
                                        None] = data.get("target_application")
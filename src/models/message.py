@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Union
 from urllib.parse import quote
-from ..utils import convert_iso, dict_to_query
+from ..utils import convert_iso, dict_to_query, patch_fields
 
 from json import dumps
 from aiohttp import FormData
@@ -135,10 +135,14 @@ class Message:
         self.channel_id: int = int(data.get("channel_id"))
         self.guild_id: Union[int, None] = int(
             data.get("guild_id")) if data.get("guild_id") is not None else None
-        self.author: Union[User, int, None] = User(
-            self.client, data.get("author")) if data.get("author") is not None else None
+        self.author: Union[User, int, None] = self.client.users.intern(
+            data.get("author")) if data.get("author") is not None else None
         self.member: Union[Member, int, None] = Member(
-            self.client, data.get("author")) if data.get("author") is not None else None
+            self.client, data.get("member")) if data.get("member") is not None else None
+
+        # Member object of a message has no user, it is the author.
+        if self.member is not None and self.member.user is None:
+            self.member.user = self.author
         self.content: str = data.get("content")
         self.timestamp: datetime = convert_iso(data.get("timestamp"))
         self.edited_timestamp: Union[datetime, None] = convert_iso(
@@ -175,6 +179,18 @@ class Message:
         self.sticker_items: Union[list, None] = data.get("sticker_items")
         self.stickers: Union[list, None] = data.get("stickers")
 
+    def patch(self, data: dict) -> dict:
+        """Apply a partial MESSAGE_UPDATE payload in place, only the present fields are changed.
+
+        Args:
+            data (dict): Partial message payload.
+
+        Returns:
+            dict: Changed attribute names mapped to their old values.
+        """
+
+        return patch_fields(self, data, _MESSAGE_FIELDS)
+
     async def create_reaction(self, emoji: str):
         """Create / add a reaction to the message.
 
@@ -213,10 +229,8 @@ class Message:
             list: List of user objects.
         """
 
-        from .user import User
-
         result = await self.client.http.request("GET", f"/channels/{self.channel_id}/messages/{self.id}/reactions/{quote(emoji)}{dict_to_query(kwargs)}")
-        return [User(self.client, i) for i in result]
+        return [self.client.users.intern(i) for i in result]
 
     async def delete_reactions(self, emoji: str = None):
         """Delete / delete all reactions from message.
@@ -331,3 +345,33 @@ class Message:
 
         result = await self.client.http.request("POST", f"/channels/{self.channel_id}/messages/{self.id}/threads", json=kwargs)
         return Channel(self.client, result)
+
+
+def _convert_user(client, data):
+    return client.users.intern(data)
+
+
+# MESSAGE_UPDATE key -> converter, for Message.patch
+_MESSAGE_FIELDS: dict = {
+    "content": None,
+    "author": _convert_user,
+    "edited_timestamp": lambda client, value: convert_iso(value),
+    "tts": None,
+    "mention_everyone": None,
+    "mentions": None,
+    "mention_roles": None,
+    "mention_channels": None,
+    "attachments": lambda client, value: [Attachment(i) for i in value],
+    "embeds": lambda client, value: [Embed(i) for i in value],
+    "reactions": None,
+    "pinned": None,
+    "type": None,
+    "activity": None,
+    "application": None,
+    "message_reference": None,
+    "flags": None,
+    "interaction": None,
+    "components": None,
+    "sticker_items": None,
+    "stickers": None
+}
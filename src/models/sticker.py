@@ -47,7 +47,7 @@ class Sticker:
         self.available: Union[bool, None] = data.get("available")
         self.guild_id: Union[int, None] = int(
             data.get("guild_id")) if data.get("guild_id") is not None else None
-        self.user: Union[User, None] = User(self.client, data.get(
+        self.user: Union[User, None] = self.client.users.intern(data.get(
             "user")) if data.get("user") is not None else None
         self.sort_value: int = data.get("sort_value")
 
@@ -4,7 +4,7 @@ Models for user and other classes about user.
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Union
+from typing import ClassVar, Union
 
 
 @dataclass
@@ -33,6 +33,23 @@ class User:
         flags_dict (dict): Flags dictionary for calculating.
     """
 
+    # Shared by all users, not a dataclass field.
+    flags_dict: ClassVar[dict] = {
+        "DISCORD_EMPLOYEE": 1 << 0,
+        "PARTNERED_SERVER_OWNER": 1 << 1,
+        "HYPESQUAD_EVENTS": 1 << 2,
+        "BUG_HUNTER_LEVEL_1": 1 << 3,
+        "HOUSE_BRAVERY": 1 << 6,
+        "HOUSE_BRILLIANCE": 1 << 7,
+        "HOUSE_BALANCE": 1 << 8,
+        "EARLY_SUPPORTER": 1 << 9,
+        "TEAM_USER": 1 << 10,
+        "BUG_HUNTER_LEVEL_2": 1 << 14,
+        "VERIFIED_BOT": 1 << 16,
+        "EARLY_VERIFIED_BOT_DEVELOPER": 1 << 17,
+        "DISCORD_CERTIFIED_MODERATOR": 1 << 18
+    }
+
     def __init__(self, client, data: dict) -> None:
         self.client = client
 
@@ -53,21 +70,18 @@ class User:
         self.premium_type: Union[int, None] = data.get("premium_type")
         self.public_flags: Union[int, None] = data.get("public_flags")
 
-        self.flags_dict: dict = {
-            "DISCORD_EMPLOYEE": 1 << 0,
-            "PARTNERED_SERVER_OWNER": 1 << 1,
-            "HYPESQUAD_EVENTS": 1 << 2,
-            "BUG_HUNTER_LEVEL_1": 1 << 3,
-            "HOUSE_BRAVERY": 1 << 6,
-            "HOUSE_BRILLIANCE": 1 << 7,
-            "HOUSE_BALANCE": 1 << 8,
-            "EARLY_SUPPORTER": 1 << 9,
-            "TEAM_USER": 1 << 10,
-            "BUG_HUNTER_LEVEL_2": 1 << 14,
-            "VERIFIED_BOT": 1 << 16,
-            "EARLY_VERIFIED_BOT_DEVELOPER": 1 << 17,
-            "DISCORD_CERTIFIED_MODERATOR": 1 << 18
-        }
+    def patch(self, data: dict) -> dict:
+        """Apply a newer user payload in place, only the present fields are changed.
+
+        Args:
+            data (dict): User payload.
+
+        Returns:
+            dict: Changed attribute names mapped to their old values.
+        """
+
+        from ..utils import patch_fields
+        return patch_fields(self, data, _USER_FIELDS)
 
     def has_public_flag(self, flag_name: str) -> bool:
         """Check if user has a public flag named x.
@@ -126,8 +140,8 @@ class Member:
         from ..utils import convert_iso
         self.client = client
 
-        self.user: Union[User, None] = User(self.client, data.get(
-            "user")) if data.get("user") is not None else None
+        self.user: Union[User, None] = self.client.users.intern(
+            data.get("user")) if data.get("user") is not None else None
         self.nick: Union[str, None] = data.get("nick")
         self.roles: list = data.get("roles")
         self.pending: Union[bool, None] = data.get("pending")
@@ -139,6 +153,19 @@ class Member:
         self.deaf: bool = data.get("deaf")
         self.mute: bool = data.get("mute")
 
+    def patch(self, data: dict) -> dict:
+        """Apply a GUILD_MEMBER_UPDATE payload in place, only the present fields are changed.
+
+        Args:
+            data (dict): Partial member payload.
+
+        Returns:
+            dict: Changed attribute names mapped to their old values.
+        """
+
+        from ..utils import patch_fields
+        return patch_fields(self, data, _MEMBER_FIELDS)
+
 
 @dataclass
 class ThreadMember:
@@ -164,3 +191,28 @@ class ThreadMember:
         self.join_timestamp: Union[int, None] = convert_iso(
             data.get("join_timestamp")) if data.get("join_timestamp") is not None else None
         self.flags: int = data.get("flags")
+
+
+# User payload key -> converter, for User.patch
+_USER_FIELDS: dict = dict.fromkeys((
+    "username", "discriminator", "avatar", "banner", "banner_color", "accent_color", "bot", "system",
+    "mfa_enabled", "locale", "verified", "email", "flags", "premium_type", "public_flags"))
+
+
+def _convert_iso(client, value):
+    from ..utils import convert_iso
+    return convert_iso(value)
+
+
+# GUILD_MEMBER_UPDATE key -> converter, for Member.patch
+_MEMBER_FIELDS: dict = {
+    "user": lambda client, value: client.users.intern(value),
+    "nick": None,
+    "roles": None,
+    "pending": None,
+    "permissions": None,
+    "joined_at": _convert_iso,
+    "premium_since": _convert_iso,
+    "deaf": None,
+    "mute": None
+}
@@ -45,7 +45,7 @@ class Webhook:
             data.get("guild_id")) if data.get("guild_id") is not None else None
         self.channel_id: Union[int, None] = int(
             data.get("channel_id")) if data.get("channel_id") is not None else None
-        self.user: Union[User, None] = User(self.client, data.get(
+        self.user: Union[User, None] = self.client.users.intern(data.get(
             "user")) if data.get("user") is not None else None
         self.name: Union[str, None] = data.get("name")
         self.avatar: Union[str, None] = data.get("avatar")
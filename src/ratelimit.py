@@ -0,0 +1,182 @@
+"""
+Gateway rate limit part of the krema.
+"""
+
+import asyncio
+from collections import deque
+from time import monotonic
+from typing import Callable, Union
+
+
+class CommandLimiter:
+    """Sliding window limiter for gateway commands.
+
+    Allows `limit` commands in any `per` seconds. A sliding window is used instead of a refilling bucket,
+    a full bucket could send twice of the limit in one window.
+
+    Args:
+        limit (int): Command count allowed in a window (default is 120).
+        per (float): Window length in seconds (default is 60.0).
+    """
+
+    def __init__(self, limit: int = 120, per: float = 60.0) -> None:
+        self.limit: int = limit
+        self.per: float = per
+
+        self._sent: deque = deque()
+
+    @property
+    def remaining(self) -> int:
+        """Count of commands that can be sent now.
+
+        Returns:
+            int: Remaining commands in current window.
+        """
+
+        self.__expire()
+        return self.limit - len(self._sent)
+
+    def delay(self, reserve: int = 0) -> float:
+        """Time to wait until one more command can be sent while keeping `reserve` commands free.
+
+        Args:
+            reserve (int): Commands that must stay free for priority commands (default is 0).
+
+        Returns:
+            float: Seconds to wait, 0.0 if a command can be sent now.
+        """
+
+        self.__expire()
+
+        used = len(self._sent) + reserve
+
+        if used < self.limit:
+            return 0.0
+
+        # Wait until enough old commands leave the window.
+        return max(self._sent[min(used - self.limit, len(self._sent) - 1)] + self.per - monotonic(), 0.001)
+
+    def hit(self):
+        """Record a sent command."""
+
+        self._sent.append(monotonic())
+
+    def __expire(self):
+        limit = monotonic() - self.per
+
+        while self._sent and self._sent[0] <= limit:
+            self._sent.popleft()
+
+
+class SendQueue:
+    """Rate-limited send queue for gateway commands.
+
+    Commands are sent in order, queued commands can use the window except `reserved` commands,
+    which are kept for heartbeats and identify. Commands with same key are coalesced while waiting, only the latest one is sent.
+
+    Args:
+        send (Callable): Coroutine function that writes a payload to the websocket.
+        limiter (CommandLimiter): Limiter for all commands, shared with priority commands.
+        reserved (int): Commands kept free for priority commands in a window (default is 3).
+
+    Attributes:
+        limiter (CommandLimiter): Limiter for all commands, shared with priority commands.
+        reserved (int): Commands kept free for priority commands in a window.
+    """
+
+    def __init__(self, send: Callable, limiter: CommandLimiter, reserved: int = 3) -> None:
+        self.limiter: CommandLimiter = limiter
+        self.reserved: int = reserved
+
+        self._send: Callable = send
+        self._queued: Union[CommandLimiter, None] = None
+        self._queue: deque = deque()
+        self._keys: dict = {}
+
+        self._task: Union[asyncio.Task, None] = None
+        self._wakeup: Union[asyncio.Event, None] = None
+        self._open: Union[asyncio.Event, None] = None
+
+    @property
+    def pending(self) -> int:
+        """Count of commands waiting to be sent.
+
+        Returns:
+            int: Queued command count.
+        """
+
+        return len(self._queue)
+
+    def start(self):
+        """Start the sender task, does nothing if it is already running."""
+
+        if self._task is not None:
+            return
+
+        self._queued = CommandLimiter(self.limiter.limit, self.limiter.per)
+        self._wakeup, self._open = asyncio.Event(), asyncio.Event()
+        self._task = asyncio.get_event_loop().create_task(self.__sender())
+
+    def open(self):
+        """Allow sending, called when the connection is identified."""
+
+        self._open.set()
+
+    def close(self):
+        """Hold queued commands until the connection is opened again."""
+
+        if self._open is not None:
+            self._open.clear()
+
+    async def put(self, payload: dict, key: str = None):
+        """Queue a command and wait until it is sent.
+
+        Args:
+            payload (dict): Gateway payload.
+            key (str, optional): Coalescing key, a waiting command with same key is replaced by this one.
+        """
+
+        if key is not None and key in self._keys:
+            entry = self._keys[key]
+            entry[0] = payload
+        else:
+            entry = [payload, asyncio.get_event_loop().create_future(), key]
+            self._queue.append(entry)
+
+            if key is not None:
+                self._keys[key] = entry
+
+            self._wakeup.set()
+
+        await asyncio.shield(entry[1])
+
+    async def __sender(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            await self._open.wait()
+
+            delay = max(self.limiter.delay(),
+                        self._queued.delay(self.reserved))
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            payload, future, key = self._queue.popleft()
+
+            if key is not None:
+                del self._keys[key]
+
+            self.limiter.hit()
+            self._queued.hit()
+
+            try:
+                await self._send(payload)
+            except Exception as error:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
@@ -0,0 +1,141 @@
+"""
+Ready state part of the krema.
+"""
+
+import asyncio
+from collections import deque
+from typing import Callable, Union
+
+
+class ReadyTracker:
+    """Tracks the guilds streamed after READY and finds when the startup is finished.
+
+    READY only has the IDs of the guilds, every guild arrives later in its own GUILD_CREATE.
+    Startup is finished when all of them have arrived (or are reported as unavailable),
+    or when no guild arrives for `timeout` seconds, because an unavailable guild may never arrive.
+
+    Calls of handlers that wait for the ready state are buffered until then and run in arrival order.
+
+    Args:
+        on_ready (Callable): Function called with the startup result when the guilds are ready, must not block.
+        timeout (float): Seconds to wait for the next guild before giving up on the missing ones (default is 2.0).
+
+    Attributes:
+        timeout (float): Seconds to wait for the next guild.
+        expected (set): IDs of the guilds that have not arrived yet.
+        received (set): IDs of the guilds that have arrived.
+        ready (bool): All guilds have arrived or the timeout passed.
+    """
+
+    def __init__(self, on_ready: Callable, timeout: float = 2.0) -> None:
+        self.timeout: float = timeout
+
+        self.expected: set = set()
+        self.received: set = set()
+        self.ready: bool = False
+
+        self._on_ready: Callable = on_ready
+        self._timer: Union[asyncio.TimerHandle, None] = None
+        self._event: asyncio.Event = asyncio.Event()
+        self._buffer: deque = deque()
+        self._flushing: bool = False
+
+    @property
+    def buffering(self) -> bool:
+        """Whether handler calls that wait for ready must be buffered now.
+
+        Returns:
+            bool: True until the guilds are ready and the buffered calls are handled.
+        """
+
+        return not self.ready or self._flushing or len(self._buffer) != 0
+
+    def start(self, packet: dict):
+        """Start tracking a new session, called for every READY.
+
+        Args:
+            packet (dict): READY event data.
+        """
+
+        self.expected = {int(i["id"]) for i in packet.get("guilds", ())}
+        self.received = set()
+        self.ready = False
+        self._event.clear()
+
+        if len(self.expected) == 0:
+            self.__finish()
+        else:
+            self.__schedule()
+
+    def arrived(self, guild_id: int):
+        """Mark a guild as arrived, called after GUILD_CREATE is handled or an unavailable GUILD_DELETE is received.
+
+        Args:
+            guild_id (int): Guild ID.
+        """
+
+        if self.ready or guild_id not in self.expected:
+            return
+
+        self.expected.discard(guild_id)
+        self.received.add(guild_id)
+
+        if len(self.expected) == 0:
+            self.__finish()
+        else:
+            self.__schedule()
+
+    def buffer(self, fn: Callable, args: tuple):
+        """Keep a handler call until the guilds are ready.
+
+        Args:
+            fn (Callable): Coroutine function of the handler.
+            args (tuple): Arguments of the handler.
+        """
+
+        self._buffer.append((fn, args))
+
+    async def flush(self, run: Callable):
+        """Run the buffered handler calls in order.
+
+        Args:
+            run (Callable): Coroutine function that runs a handler coroutine.
+        """
+
+        self._flushing = True
+
+        try:
+            while self._buffer:
+                fn, args = self._buffer.popleft()
+                await run(fn(*args))
+        finally:
+            self._flushing = False
+
+    async def wait(self):
+        """Wait until the guilds are ready."""
+
+        await self._event.wait()
+
+    def __schedule(self):
+        """Restart the timeout for the next guild."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer = asyncio.get_event_loop().call_later(self.timeout, self.__finish)
+
+    def __finish(self):
+        if self.ready:
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self.ready = True
+        self._event.set()
+
+        self._on_ready({
+            "guilds": sorted(self.received),
+            "unavailable": sorted(self.expected)
+        })
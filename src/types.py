@@ -39,8 +39,82 @@ class Intents:
     DIRECT_MESSAGE_REACTIONS: int = 1 << 13
     DIRECT_MESSAGE_TYPING: int = 1 << 14
 
+    # Event name -> intents that enable the event, DM intents are used when DM events are wanted.
+    EVENTS: dict = {
+        "guild_create": (GUILDS, 0),
+        "guild_update": (GUILDS, 0),
+        "guild_delete": (GUILDS, 0),
+        "guild_role_create": (GUILDS, 0),
+        "guild_role_update": (GUILDS, 0),
+        "guild_role_delete": (GUILDS, 0),
+        "channel_create": (GUILDS, 0),
+        "channel_update": (GUILDS, 0),
+        "channel_delete": (GUILDS, 0),
+        "channel_pins_update": (GUILDS, DIRECT_MESSAGES),
+        "thread_create": (GUILDS, 0),
+        "thread_update": (GUILDS, 0),
+        "thread_delete": (GUILDS, 0),
+        "thread_list_sync": (GUILDS, 0),
+        "thread_member_update": (GUILDS, 0),
+        "thread_members_update": (GUILDS | GUILD_MEMBERS, 0),
+        "stage_instance_create": (GUILDS, 0),
+        "stage_instance_update": (GUILDS, 0),
+        "stage_instance_delete": (GUILDS, 0),
+        "guild_member_add": (GUILD_MEMBERS, 0),
+        "guild_member_update": (GUILD_MEMBERS, 0),
+        "guild_member_remove": (GUILD_MEMBERS, 0),
+        "guild_ban_add": (GUILD_BANS, 0),
+        "guild_ban_remove": (GUILD_BANS, 0),
+        "guild_emojis_update": (GUILD_EMOJIS_AND_STICKERS, 0),
+        "guild_stickers_update": (GUILD_EMOJIS_AND_STICKERS, 0),
+        "guild_integrations_update": (GUILD_INTEGRATIONS, 0),
+        "guild_integration_update": (GUILD_INTEGRATIONS, 0),
+        "integration_create": (GUILD_INTEGRATIONS, 0),
+        "integration_update": (GUILD_INTEGRATIONS, 0),
+        "integration_delete": (GUILD_INTEGRATIONS, 0),
+        "webhooks_update": (GUILD_WEBHOOKS, 0),
+        "invite_create": (GUILD_INVITES, 0),
+        "invite_delete": (GUILD_INVITES, 0),
+        "voice_state_update": (GUILD_VOICE_STATES, 0),
+        "presence_update": (GUILD_PRESENCES, 0),
+        "message_create": (GUILD_MESSAGES, DIRECT_MESSAGES),
+        "message_update": (GUILD_MESSAGES, DIRECT_MESSAGES),
+        "message_delete": (GUILD_MESSAGES, DIRECT_MESSAGES),
+        "message_delete_bulk": (GUILD_MESSAGES, 0),
+        "message_reaction_add": (GUILD_MESSAGE_REACTIONS, DIRECT_MESSAGE_REACTIONS),
+        "message_reaction_remove": (GUILD_MESSAGE_REACTIONS, DIRECT_MESSAGE_REACTIONS),
+        "message_reaction_remove_all": (GUILD_MESSAGE_REACTIONS, DIRECT_MESSAGE_REACTIONS),
+        "message_reaction_remove_emoji": (GUILD_MESSAGE_REACTIONS, DIRECT_MESSAGE_REACTIONS),
+        "typing_start": (GUILD_MESSAGE_TYPING, DIRECT_MESSAGE_TYPING)
+    }
+
     def All(self):
-        attrs = [i for i in dir(self) if not i.startswith("__") and i != "All"]
+        attrs = [i for i in dir(self) if i.isupper() and isinstance(getattr(self, i), int)]
         result = sum(int(getattr(self, i)) for i in attrs)
 
         return result
+
+    def FromEvents(self, events, direct_messages: bool = True) -> int:
+        """Calculate minimal intents for the events.
+
+        GUILDS intent is always added, guild cache of the client depends on it.
+
+        Args:
+            events (Iterable): Event names in lowercase.
+            direct_messages (bool, optional): Add intents for DM events too (default is True).
+
+        Returns:
+            int: Intents value.
+
+        Examples:
+            >>> krema.types.Intents().FromEvents(["message_create"], direct_messages=False)
+            513
+        """
+
+        result = self.GUILDS
+
+        for event in events:
+            guild_intents, dm_intents = self.EVENTS.get(event, (0, 0))
+            result |= guild_intents | (dm_intents if direct_messages else 0)
+
+        return result
@@ -5,6 +5,7 @@ Utils part of the krema.
 from datetime import datetime
 from base64 import b64encode
 from os.path import basename
+from weakref import WeakSet
 
 
 def convert_iso(date: str) -> datetime:
@@ -20,6 +21,106 @@ def convert_iso(date: str) -> datetime:
     return datetime.fromisoformat(date)
 
 
+def patch_fields(obj, data: dict, fields: dict) -> dict:
+    """Apply the present fields of a partial payload to a model in place.
+
+    Args:
+        obj (Any): Model object with `client` attribute.
+        data (dict): Partial payload.
+        fields (dict): Payload key (same with the attribute name) mapped to a converter that gets `(client, value)`, or None for plain values.
+
+    Returns:
+        dict: Changed attribute names mapped to their old values.
+
+    Examples:
+        >>> krema.utils.patch_fields(message, {"content": "edited"}, {"content": None})
+        {"content": "hello"}
+    """
+
+    changed = {}
+    snapshots = getattr(obj, "_snapshots", None)
+
+    for key, value in data.items():
+        if key not in fields:
+            continue
+
+        convert = fields[key]
+        old = getattr(obj, key, None)
+
+        if convert is not None and value is not None:
+            value = convert(obj.client, value)
+        elif old == value:
+            continue
+
+        changed[key] = old
+
+        if snapshots:
+            for snapshot in snapshots:
+                snapshot._freeze(key, old)
+
+        setattr(obj, key, value)
+
+    return changed
+
+
+class Snapshot:
+    """Copy-on-write snapshot of a model.
+
+    Nothing is copied when the snapshot is taken, attributes are read from the live object.
+    When `patch_fields` changes an attribute of the object, the old value is kept in the snapshot first,
+    so the snapshot always shows the state at the time it was taken.
+    `isinstance` checks work with the class of the object.
+
+    Shared objects like interned users are changed in place by other events, give their attributes in `nested`
+    so they are snapshotted too.
+
+    Args:
+        obj (Any): Model object.
+        nested (tuple, optional): Attribute names of nested models that are snapshotted with the object (default is empty).
+
+    Examples:
+        >>> before = krema.utils.Snapshot(message)
+        >>> message.patch({"content": "edited"})
+        >>> before.content, message.content
+        ("hello", "edited")
+    """
+
+    def __init__(self, obj, nested: tuple = ()) -> None:
+        self._base = obj
+        self._frozen: dict = {}
+
+        if getattr(obj, "_snapshots", None) is None:
+            obj._snapshots = WeakSet()
+
+        obj._snapshots.add(self)
+
+        for name in nested:
+            value = getattr(obj, name, None)
+
+            if value is not None:
+                self._frozen[name] = Snapshot(value)
+
+    @property
+    def __class__(self):
+        return type(self._base)
+
+    def __getattr__(self, name: str):
+        frozen = self.__dict__["_frozen"]
+
+        if name in frozen:
+            return frozen[name]
+
+        return getattr(self.__dict__["_base"], name)
+
+    def __repr__(self) -> str:
+        return f"Snapshot({self._base!r})"
+
+    def _freeze(self, name: str, value):
+        """Keep the value of an attribute before it is changed on the live object."""
+
+        self._frozen.setdefault(name, value)
+
+
 def dict_to_query(data: dict) -> str:
     """Convert a dictionary to the query string.
 
@@ -0,0 +1,173 @@
+"""
+Event waiters part of the krema.
+"""
+
+import asyncio
+from typing import Callable, Union
+
+
+# Waiter keys from the most selective one, a waiter is indexed by the first key it has.
+KEYS: tuple = ("custom_id", "message_id", "channel_id")
+
+
+def waiter_keys(event_data, event_type: str) -> dict:
+    """Get waiter keys of an event from the raw payload.
+
+    Args:
+        event_data: Event data from gateway.
+        event_type (str): Event name in lowercase.
+
+    Returns:
+        dict: Custom ID (str), message ID (int) and channel ID (int) of the event, None when the event has no such key.
+    """
+
+    if not isinstance(event_data, dict):
+        return dict.fromkeys(KEYS)
+
+    custom_id = (event_data.get("data") or {}).get("custom_id") if event_type == "interaction_create" else None
+    message_id = event_data.get("message_id") or (event_data.get("message") or {}).get("id")
+    channel_id = event_data.get("channel_id")
+
+    # Message events carry the message ID in the `id` field.
+    if message_id is None and event_type.startswith("message_"):
+        message_id = event_data.get("id")
+
+    return {
+        "custom_id": custom_id,
+        "message_id": int(message_id) if message_id else None,
+        "channel_id": int(channel_id) if channel_id else None
+    }
+
+
+class Waiter:
+    """A pending `wait_for` or `collect` call.
+
+    Args:
+        event_name (str): Event name in lowercase.
+        check (Callable, None): Function that gets the handler arguments and returns True for the wanted event.
+        keys (dict): Keys that the event must match, `custom_id`, `message_id` and `channel_id`.
+        limit (int, None): Count of events to collect, None for no limit.
+
+    Attributes:
+        event_name (str): Event name in lowercase.
+        check (Callable, None): Function that gets the handler arguments and returns True for the wanted event.
+        keys (dict): Keys that the event must match.
+        limit (int, None): Count of events to collect.
+        results (list): Collected events.
+        future (asyncio.Future): Future that is resolved when enough events are collected.
+    """
+
+    def __init__(self, event_name: str, check: Union[Callable, None], keys: dict, limit: Union[int, None] = 1) -> None:
+        self.event_name: str = event_name
+        self.check: Union[Callable, None] = check
+        self.keys: dict = keys
+        self.limit: Union[int, None] = limit
+
+        self.results: list = []
+        self.future: asyncio.Future = asyncio.get_event_loop().create_future()
+
+        self.index_key: Union[tuple, None] = next(((i, keys[i]) for i in KEYS if i in keys), None)
+
+    def matches(self, keys: dict) -> bool:
+        """Whether the event keys match all keys of the waiter.
+
+        Args:
+            keys (dict): Keys of the event from `waiter_keys`.
+
+        Returns:
+            bool: True if they match.
+        """
+
+        return all(keys[i] == value for i, value in self.keys.items())
+
+    def feed(self, args: tuple):
+        """Run the check for an event and collect it.
+
+        Args:
+            args (tuple): Handler arguments of the event.
+        """
+
+        if self.future.done():
+            return
+
+        try:
+            if self.check is not None and not self.check(*args):
+                return
+        except Exception as error:
+            self.future.set_exception(error)
+            return
+
+        self.results.append(args[0] if len(args) == 1 else args)
+
+        if self.limit is not None and len(self.results) >= self.limit:
+            self.future.set_result(self.results)
+
+
+class Waiters:
+    """Index of pending waiters.
+
+    Waiters are indexed by event name and their most selective key, so an event only runs the checks of the waiters
+    with same custom ID, message ID or channel ID (and the waiters without a key).
+    """
+
+    def __init__(self) -> None:
+        # Event name -> index key (None for waiters without a key) -> waiters.
+        self._index: dict = {}
+
+    def __contains__(self, event_name: str) -> bool:
+        return event_name in self._index
+
+    def add(self, waiter: Waiter):
+        """Add a waiter to the index.
+
+        Args:
+            waiter (Waiter): Waiter to add.
+        """
+
+        self._index.setdefault(waiter.event_name, {}).setdefault(
+            waiter.index_key, []).append(waiter)
+
+    def remove(self, waiter: Waiter):
+        """Remove a waiter from the index, does nothing if it is already removed.
+
+        Args:
+            waiter (Waiter): Waiter to remove.
+        """
+
+        index = self._index.get(waiter.event_name)
+
+        if index is None or waiter not in index.get(waiter.index_key, ()):
+            return
+
+        index[waiter.index_key].remove(waiter)
+
+        if len(index[waiter.index_key]) == 0:
+            del index[waiter.index_key]
+
+        if len(index) == 0:
+            del self._index[waiter.event_name]
+
+    def find(self, event_name: str, event_data) -> list:
+        """Find the waiters whose keys match an event.
+
+        Args:
+            event_name (str): Event name in lowercase.
+            event_data: Event data from gateway.
+
+        Returns:
+            list: Matching waiters, checks are not run yet.
+        """
+
+        index = self._index.get(event_name)
+
+        if index is None:
+            return []
+
+        keys = waiter_keys(event_data, event_name)
+        candidates = list(index.get(None, ()))
+
+        for i in KEYS:
+            if keys[i] is not None:
+                candidates.extend(index.get((i, keys[i]), ()))
+
+        return [i for i in candidates if i.matches(keys)]
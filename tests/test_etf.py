@@ -0,0 +1,75 @@
+"""
+Tests for the ETF encoding of the krema.
+"""
+
+import struct
+import unittest
+import zlib
+
+from krema import etf
+
+
+class RoundTripTest(unittest.TestCase):
+    def test_values(self):
+        for value in (None, True, False, 0, 255, 256, -1, 2 ** 31, -2 ** 31 - 1, 2 ** 64 + 1, 1.5, "", "krema", "ğüş"):
+            with self.subTest(value=value):
+                self.assertEqual(etf.loads(etf.dumps(value)), value)
+
+    def test_payload(self):
+        payload = {
+            "op": 0, "s": 42, "t": "MESSAGE_CREATE",
+            "d": {"id": 881231209581985813, "content": "hi", "embeds": [], "mentions": [{"id": 5}], "pinned": False, "nonce": None}
+        }
+
+        self.assertEqual(etf.loads(etf.dumps(payload)), payload)
+
+    def test_tuple_as_list(self):
+        self.assertEqual(etf.loads(etf.dumps((1, "a"))), [1, "a"])
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            etf.dumps(object())
+
+
+class DecodeTest(unittest.TestCase):
+    def test_string_ext(self):
+        # Erlang strings are lists of bytes.
+        data = bytes((etf.VERSION, etf.STRING_EXT)) + struct.pack(">H", 3) + bytes((1, 2, 200))
+        self.assertEqual(etf.loads(data), [1, 2, 200])
+
+    def test_atoms(self):
+        data = bytes((etf.VERSION, etf.ATOM_EXT)) + struct.pack(">H", 4) + b"true"
+        self.assertIs(etf.loads(data), True)
+
+        data = bytes((etf.VERSION, etf.SMALL_ATOM_EXT, 5)) + b"hello"
+        self.assertEqual(etf.loads(data), "hello")
+
+    def test_small_tuple(self):
+        data = bytes((etf.VERSION, etf.SMALL_TUPLE_EXT, 2, etf.SMALL_INTEGER_EXT, 1, etf.NIL_EXT))
+        self.assertEqual(etf.loads(data), (1, []))
+
+    def test_float_ext(self):
+        data = bytes((etf.VERSION, etf.FLOAT_EXT)) + b"1.25000000000000000000e+00".ljust(31, b"\0")
+        self.assertEqual(etf.loads(data), 1.25)
+
+    def test_improper_list(self):
+        data = bytes((etf.VERSION, etf.LIST_EXT)) + struct.pack(">I", 1) + bytes((etf.SMALL_INTEGER_EXT, 1, etf.SMALL_INTEGER_EXT, 2))
+        self.assertEqual(etf.loads(data), [1, 2])
+
+    def test_compressed(self):
+        term = etf.dumps({"op": 11})[1:]
+        data = bytes((etf.VERSION, etf.COMPRESSED)) + struct.pack(">I", len(term)) + zlib.compress(term)
+
+        self.assertEqual(etf.loads(data), {"op": 11})
+
+    def test_invalid(self):
+        payload = etf.dumps({"op": 0, "d": {"content": "krema"}})
+
+        for data in (b"", b"\x00", payload[:-1], payload[:3], bytes((etf.VERSION, etf.INTEGER_EXT, 0)), bytes((etf.VERSION, 1))):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    etf.loads(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
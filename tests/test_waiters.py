@@ -0,0 +1,120 @@
+"""
+Tests for the event waiters of the krema.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import unittest
+from types import SimpleNamespace
+
+import aiohttp
+
+import krema
+from krema.gateway import Gateway
+
+
+def packet(seq: int, event_type: str, data: dict) -> SimpleNamespace:
+    data = json.dumps({"t": event_type, "s": seq, "op": 0, "d": data}, separators=(",", ":"))
+    return SimpleNamespace(type=aiohttp.WSMsgType.TEXT, data=data, extra=None)
+
+
+def message_packet(seq: int, content: str, message_id: int = None) -> SimpleNamespace:
+    message = {
+        "id": str(message_id or 100 + seq), "channel_id": "10", "guild_id": "1", "content": content,
+        "timestamp": "2021-08-20T12:00:00+00:00", "author": {"id": "5", "username": "krema"},
+        "attachments": [], "embeds": [], "mentions": [], "mention_roles": []
+    }
+
+    return packet(seq, "MESSAGE_CREATE", message)
+
+
+class WaitForTest(unittest.IsolatedAsyncioTestCase):
+    def start_gateway(self) -> Gateway:
+        # One worker, so the waiting handler holds the only lane.
+        client = krema.Client(compress=None, dispatch_workers=1)
+        gateway = Gateway(client)
+        client.connection = gateway
+        gateway.dispatcher.start()
+
+        self.addCleanup(gateway.dispatcher.stop)
+        return gateway
+
+    async def test_wait_for_inside_handler(self):
+        gateway = self.start_gateway()
+        client = gateway.client
+
+        done = asyncio.Event()
+        result = {}
+
+        @client.event()
+        async def message_create(message):
+            if message.content != "start":
+                return
+
+            reply = await client.wait_for("message_create", channel_id=message.channel_id,
+                                          check=lambda m: m.content == "reply", timeout=1)
+            result["content"] = reply.content
+            done.set()
+
+        await gateway._Gateway__handle_packet(message_packet(1, "start"))
+
+        while "message_create" not in client.waiters:
+            await asyncio.sleep(0.01)
+
+        await gateway._Gateway__handle_packet(message_packet(2, "reply"))
+
+        await asyncio.wait_for(done.wait(), 2)
+        self.assertEqual(result["content"], "reply")
+
+    async def test_waiter_gets_patched_message(self):
+        gateway = self.start_gateway()
+        client = gateway.client
+        handled = asyncio.Event()
+        result = {}
+
+        @client.event()
+        async def message_update(message):
+            result["handler"] = message
+            handled.set()
+
+        await gateway._Gateway__handle_packet(message_packet(1, "old", message_id=100))
+
+        while client.messages.get(100) is None:
+            await asyncio.sleep(0.01)
+
+        waiter = asyncio.ensure_future(client.wait_for("message_update", message_id=100, timeout=1))
+        await asyncio.sleep(0)
+
+        await gateway._Gateway__handle_packet(packet(2, "MESSAGE_UPDATE", {"id": "100", "channel_id": "10", "content": "new"}))
+
+        message = await waiter
+        await asyncio.wait_for(handled.wait(), 1)
+
+        self.assertIs(message, client.messages.get(100))
+        self.assertIs(result["handler"], message)
+        self.assertEqual(message.content, "new")
+
+    async def test_waiter_decode_error(self):
+        gateway = self.start_gateway()
+        client = gateway.client
+
+        waiter = asyncio.ensure_future(client.wait_for("message_update", message_id=200, timeout=1))
+        await asyncio.sleep(0)
+
+        # Partial update of an uncached message can't be decoded, the receiver must keep running.
+        with contextlib.redirect_stderr(io.StringIO()):
+            await gateway._Gateway__handle_packet(packet(1, "MESSAGE_UPDATE", {"id": "200", "channel_id": "10", "content": "new"}))
+
+        await gateway._Gateway__handle_packet(message_packet(2, "after", message_id=200))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await waiter
+
+        # Handlers don't decode the event again.
+        self.assertEqual(gateway.dispatcher.metrics["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()